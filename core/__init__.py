@@ -42,15 +42,18 @@ from .send import (
     try_send_tts,
 )
 from .utils import (
+    EMPTY_MAPPING,
     MSG_TYPE_FRIEND,
     MSG_TYPE_GROUP,
     MSG_TYPE_KEYWORD_FRIEND,
     MSG_TYPE_KEYWORD_GROUP,
     async_with_umo_fallback,
     get_session_log_str,
+    is_contentless_message,
     is_group_session_id,
     is_private_session,
     is_quiet_time,
+    is_sqlite_lock_error,
     parse_llm_json,
     parse_session_id,
     resolve_full_umo,
@@ -68,10 +71,13 @@ __all__ = [
     "resolve_full_umo",
     "is_private_session",
     "is_group_session_id",
+    "is_contentless_message",
+    "is_sqlite_lock_error",
     "MSG_TYPE_FRIEND",
     "MSG_TYPE_GROUP",
     "MSG_TYPE_KEYWORD_FRIEND",
     "MSG_TYPE_KEYWORD_GROUP",
+    "EMPTY_MAPPING",
     # config
     "validate_config",
     "get_session_config",
@@ -4,6 +4,7 @@ import json
 import zoneinfo
 from collections.abc import Mapping
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Final, Literal
 
 
@@ -149,13 +150,15 @@ def compute_auto_check_interval(
     settings: AutoCheckSettings,
     timezone: zoneinfo.ZoneInfo | None,
     unanswered_count: int,
+    *,
+    now: datetime | None = None,
 ) -> int:
     from .scheduler import compute_weighted_interval
 
     interval_mode = schedule_settings.get("interval_mode", "adaptive")
     if interval_mode == "weighted_random":
         base_interval = compute_weighted_interval(
-            schedule_settings, timezone, unanswered_count
+            schedule_settings, timezone, unanswered_count, now=now
         )
     else:
         base_interval = compute_adaptive_interval(settings, unanswered_count)
@@ -178,6 +181,8 @@ def compute_session_interval(
     session_config: dict,
     timezone: zoneinfo.ZoneInfo | None,
     unanswered_count: int,
+    *,
+    now: datetime | None = None,
 ) -> int:
     from .scheduler import (
         compute_adaptive_interval as compute_schedule_adaptive_interval,
@@ -191,10 +196,13 @@ def compute_session_interval(
             settings,
             timezone,
             unanswered_count,
+            now=now,
         )
     if schedule_settings.get("interval_mode", "adaptive") != "weighted_random":
         return compute_schedule_adaptive_interval(schedule_settings, unanswered_count)
-    return compute_weighted_interval(schedule_settings, timezone, unanswered_count)
+    return compute_weighted_interval(
+        schedule_settings, timezone, unanswered_count, now=now
+    )
 
 
 def _reject_duplicate_keys(pairs: list[tuple[str, object]]) -> dict[str, object]:
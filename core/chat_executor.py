@@ -42,7 +42,12 @@ async def check_and_chat(
         skip_unanswered = bool(
             habit_task and not habit_task.get("count_unanswered", False)
         )
-        session_config, unanswered_count, limit_reached = await _check_preconditions(
+        (
+            session_config,
+            unanswered_count,
+            limit_reached,
+            last_message_time,
+        ) = await _check_preconditions(
             plugin, session_id, skip_unanswered=skip_unanswered
         )
         if session_config is None:
@@ -52,7 +57,12 @@ async def check_and_chat(
         auto_settings = auto_check.resolve_auto_check_settings(session_config)
         if auto_settings.enable and (not ctx_job_id or habit_task):
             auto_result = await _prepare_and_call_auto_check(
-                plugin, session_id, session_config, unanswered_count, ctx_job_id
+                plugin,
+                session_id,
+                session_config,
+                unanswered_count,
+                ctx_job_id,
+                last_message_time,
             )
             if auto_result is None:
                 if (
@@ -84,7 +94,12 @@ async def check_and_chat(
             )
         else:
             llm_result = await _prepare_and_call_llm(
-                plugin, session_id, session_config, unanswered_count, ctx_job_id
+                plugin,
+                session_id,
+                session_config,
+                unanswered_count,
+                ctx_job_id,
+                last_message_time,
             )
         if plugin._gate_verdict(current_gate) is not GateVerdict.CURRENT:
             return
@@ -147,12 +162,16 @@ def resolve_session_umo(plugin: ProactiveChatPlugin, session_id: str) -> str | N
     resolved_parts = parse_session_id(resolved)
     if not resolved_parts:
         return resolved
-    running = {
-        platform.meta().id: platform
-        for platform in plugin.context.platform_manager.get_insts()
-        if platform.meta().id
-    }
-    platform = running.get(resolved_parts[0])
+    # 只需找一個平台：單次掃描，命中即停止
+    platform_id = resolved_parts[0]
+    platform = next(
+        (
+            inst
+            for inst in plugin.context.platform_manager.get_insts()
+            if inst.meta().id == platform_id
+        ),
+        None,
+    )
     if platform is None or platform.status != PlatformStatus.RUNNING:
         return None
     return resolved
@@ -14,6 +14,9 @@ from astrbot.api import logger
 from astrbot.core.config.astrbot_config import AstrBotConfig
 
 _LOG_TAG = "[主動訊息]"
+# 配置快照以串流方式編碼，累積到此大小才寫出一次，避免整份 JSON 字串常駐記憶體
+_SNAPSHOT_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+_SNAPSHOT_WRITE_CHUNK = 64 * 1024
 
 
 # ── 驗證 ──────────────────────────────────────────────────
@@ -21,6 +24,8 @@ _LOG_TAG = "[主動訊息]"
 
 async def validate_config(config: AstrBotConfig) -> None:
     """驗證插件配置的完整性和有效性。"""
+    # 配置在每次載入時都會重新驗證，順帶丟棄舊配置的會話索引
+    _SESSION_INDEXES.clear()
     try:
         for label, settings_key, sessions_key in (
             ("私聊", "private_settings", "private_sessions"),
@@ -107,35 +112,71 @@ def get_context_analysis_provider_id(
     return ""
 
 
-def _is_target_match(target_id: str, config_id: str) -> bool:
-    """精確比對 target_id 與純 ID 配置。
+class _SessionIndex:
+    """會話 ID 列表的查找索引，回傳第一個匹配項的位置。
 
-    支援完全匹配或以分隔符 ':' 為邊界的尾部匹配，
-    避免 '123' 誤匹配 '4123'。
+    完整 UMO 配置必須完整比對平台、訊息類型與目標 ID；純 ID 配置才允許
+    只以 target_id 比對，避免跨平台同 ID 誤啟用。純 ID 支援完全匹配或以
+    ':' 為邊界的尾部匹配（避免 '123' 誤匹配 '4123'）；純 ID 本身不含 ':'，
+    故尾部匹配只可能命中 target_id 的最後一段。
     """
-    if target_id == config_id:
-        return True
-    # 帶分隔符的尾部匹配：確保 config_id 前面是 ':'
-    return target_id.endswith(f":{config_id}")
 
+    __slots__ = ("source", "by_umo", "by_target")
 
-def _is_config_session_match(
-    session_id: str,
-    parsed_session: tuple[str, str, str],
-    target_id: str,
-    config_id: str,
-) -> bool:
-    """比對會話配置。
+    def __init__(self, source, config_ids) -> None:
+        from .utils import parse_session_id
 
-    完整 UMO 配置必須完整比對平台、訊息類型與目標 ID；純 ID 配置才允許
-    只以 target_id 比對，避免跨平台同 ID 誤啟用。
-    """
-    from .utils import parse_session_id
+        self.source = source
+        self.by_umo: dict[tuple[str, str, str], int] = {}
+        self.by_target: dict[str, int] = {}
+        for pos, cid in enumerate(config_ids):
+            if cid is None:
+                continue
+            parsed = parse_session_id(cid)
+            if parsed:
+                self.by_umo.setdefault(parsed, pos)
+            else:
+                self.by_target.setdefault(cid, pos)
+
+    def first_match(
+        self, parsed_session: tuple[str, str, str], target_id: str
+    ) -> int | None:
+        candidates = [
+            self.by_umo.get(parsed_session),
+            self.by_target.get(target_id),
+        ]
+        _, sep, tail = target_id.rpartition(":")
+        if sep:
+            candidates.append(self.by_target.get(tail))
+        hits = [pos for pos in candidates if pos is not None]
+        return min(hits) if hits else None
+
+
+# 以列表物件 id 為鍵（索引持有列表本身，id 不會被重用）。插件不會修改配置，
+# WebUI 存檔後插件重載並重新執行 validate_config，由它清空索引；
+# 因此失效只依賴該清空，不做其他啟發式檢查
+_SESSION_INDEXES: dict[int, _SessionIndex] = {}
+_SESSION_INDEX_LIMIT = 32
 
-    parsed = parse_session_id(config_id)
-    if parsed:
-        return parsed == parsed_session or config_id == session_id
-    return _is_target_match(target_id, config_id)
+
+def _get_session_index(source, config_ids) -> _SessionIndex:
+    index = _SESSION_INDEXES.get(id(source))
+    if index is None or index.source is not source:
+        if len(_SESSION_INDEXES) >= _SESSION_INDEX_LIMIT:
+            _SESSION_INDEXES.clear()
+        index = _SessionIndex(source, config_ids(source))
+        _SESSION_INDEXES[id(source)] = index
+    return index
+
+
+def _personal_session_ids(sessions):
+    for sc in sessions:
+        cid = str(sc.get("session_id", ""))
+        yield cid or None
+
+
+def _session_list_ids(session_list):
+    return (str(config_id) for config_id in session_list)
 
 
 def _match_session(
@@ -150,9 +191,13 @@ def _match_session(
 ) -> dict | None:
     """通用的會話配置匹配：先查個性化列表，再查全域 session_list。"""
     # 1) 個性化配置
-    for sc in config.get(sessions_key, ()):
-        cid = str(sc.get("session_id", ""))
-        if cid and _is_config_session_match(session_id, parsed_session, target_id, cid):
+    sessions = config.get(sessions_key, ())
+    if sessions:
+        pos = _get_session_index(sessions, _personal_session_ids).first_match(
+            parsed_session, target_id
+        )
+        if pos is not None:
+            sc = sessions[pos]
             if not sc.get("enable", False):
                 return None
             out = sc.copy()
@@ -169,9 +214,13 @@ def _match_session(
         out["_session_type"] = session_type
         out["_allow_all_sessions"] = True
         return out
-    if any(
-        _is_config_session_match(session_id, parsed_session, target_id, str(config_id))
-        for config_id in settings.get("session_list", ())
+    session_list = settings.get("session_list", ())
+    if (
+        session_list
+        and _get_session_index(session_list, _session_list_ids).first_match(
+            parsed_session, target_id
+        )
+        is not None
     ):
         out = settings.copy()
         out["_session_type"] = session_type
@@ -191,7 +240,17 @@ async def backup_configurations(config: AstrBotConfig, data_dir: Path) -> None:
         # 配置快照
         snap_file = data_dir / "user_config_snapshot.json"
         async with aiofiles.open(snap_file, "w", encoding="utf-8") as f:
-            await f.write(json.dumps(dict(config), indent=2, ensure_ascii=False))
+            buffer: list[str] = []
+            buffered = 0
+            for chunk in _SNAPSHOT_ENCODER.iterencode(dict(config)):
+                buffer.append(chunk)
+                buffered += len(chunk)
+                if buffered >= _SNAPSHOT_WRITE_CHUNK:
+                    await f.write("".join(buffer))
+                    buffer.clear()
+                    buffered = 0
+            if buffer:
+                await f.write("".join(buffer))
 
         # Prompt 彙總
         lines: list[str] = [
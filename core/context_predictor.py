@@ -6,6 +6,12 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import string
+import time
+from collections import OrderedDict
+from collections.abc import Callable
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -32,10 +38,138 @@ def _load_prompt(filename: str) -> str:
     return path.read_text(encoding="utf-8").strip()
 
 
+def _compile_template(template: str) -> Callable[..., str]:
+    """將 ``str.format`` 模板預先拆成（文字, 欄位）片段，渲染時只需串接。
+
+    模板只允許簡單的具名欄位（不支援格式規格與轉換），載入時即檢查。
+    """
+    segments: list[tuple[str, str | None]] = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if spec or conversion or (field is not None and not field.isidentifier()):
+            raise ValueError(f"{_LOG_TAG} prompt 模板欄位不支援: {{{field}}}")
+        segments.append((literal, field))
+    frozen = tuple(segments)
+
+    def render(**values: str) -> str:
+        return "".join(
+            literal if field is None else literal + values[field]
+            for literal, field in frozen
+        )
+
+    return render
+
+
 PREDICT_TIMING_PROMPT = _load_prompt("predict_timing.txt")
 PREDICT_TIMING_SYSTEM = _load_prompt("predict_timing_system.txt")
 CHECK_CANCEL_PROMPT = _load_prompt("check_cancel.txt")
 CHECK_CANCEL_SYSTEM = _load_prompt("check_cancel_system.txt")
+_render_predict_timing = _compile_template(PREDICT_TIMING_PROMPT)
+_render_check_cancel = _compile_template(CHECK_CANCEL_PROMPT)
+
+# ── LLM 回應快取 ─────────────────────────────────────────────
+_RESPONSE_CACHE_TTL_SECONDS = 300.0
+_RESPONSE_CACHE_MAX_ENTRIES = 512
+
+
+class _ResponseCache:
+    """以完整請求內容為鍵的 LLM 回應快取（TTL + LRU）。
+
+    鍵涵蓋 provider、system prompt 與 user prompt，只有完全相同的請求才會命中，
+    例如短時間內重複送出的同一句話，不會改變原本的判斷結果。
+    """
+
+    __slots__ = ("_entries", "_max_entries", "_ttl")
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._max_entries = max_entries
+        self._ttl = ttl
+
+    @staticmethod
+    def make_key(provider_id: str, system_prompt: str, prompt: str) -> str:
+        payload = "\0".join((provider_id, system_prompt, prompt))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_RESPONSE_CACHE = _ResponseCache(
+    _RESPONSE_CACHE_MAX_ENTRIES, _RESPONSE_CACHE_TTL_SECONDS
+)
+# 進行中的請求：相同鍵的並發請求共用同一次 LLM 往返，而非各自送出
+_INFLIGHT_REQUESTS: dict[str, asyncio.Future[str]] = {}
+
+
+async def _generate_cached(
+    context: Context,
+    *,
+    provider_id: str,
+    prompt: str,
+    system_prompt: str,
+) -> tuple[str, str]:
+    """呼叫 LLM 並回傳 (completion_text, cache_key)。
+
+    相同請求在 TTL 內直接重用；若相同請求仍在進行中，則等待其結果。
+    """
+    key = _ResponseCache.make_key(provider_id or "", system_prompt, prompt)
+    cached = _RESPONSE_CACHE.get(key)
+    if cached is not None:
+        logger.debug(f"{_LOG_TAG} 命中 LLM 回應快取，略過重複請求。")
+        return cached, key
+    pending = _INFLIGHT_REQUESTS.get(key)
+    if pending is not None:
+        logger.debug(f"{_LOG_TAG} 相同請求進行中，等待共用結果。")
+        return await asyncio.shield(pending), key
+
+    future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+    _INFLIGHT_REQUESTS[key] = future
+    text = ""
+    try:
+        resp = await context.llm_generate(
+            chat_provider_id=provider_id,
+            prompt=prompt,
+            system_prompt=system_prompt,
+        )
+        completion = getattr(resp, "completion_text", None) if resp else None
+        if isinstance(completion, str):
+            text = completion
+    finally:
+        # 失敗或取消時，等待中的相同請求拿到空字串，視同本次無結果
+        del _INFLIGHT_REQUESTS[key]
+        future.set_result(text)
+    return text, key
+
+
+def _message_text(content) -> str:
+    """取出訊息文字；字串直接回傳，結構化內容只串接文字部分。"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(
+            part if isinstance(part, str) else part.get("text", "")
+            for part in content
+            if isinstance(part, str)
+            or (isinstance(part, dict) and part.get("type") == "text")
+        )
+    return ""
 
 
 def build_recent_messages_str(history: list, max_messages: int = 10) -> str:
@@ -43,33 +177,16 @@ def build_recent_messages_str(history: list, max_messages: int = 10) -> str:
     if not history:
         return "（無最近訊息）"
 
-    recent = (
-        history[-max_messages:]
-        if max_messages > 0 and len(history) > max_messages
-        else history
-    )
-    lines: list[str] = []
-    for msg in recent:
-        if not isinstance(msg, dict):
-            continue
-        role = msg.get("role", "unknown")
-        content = msg.get("content", "")
-        if isinstance(content, list):
-            # 從結構化內容中提取文字部分
-            text_parts = []
-            for part in content:
-                if isinstance(part, dict) and part.get("type") == "text":
-                    text_parts.append(part.get("text", ""))
-                elif isinstance(part, str):
-                    text_parts.append(part)
-            content = " ".join(text_parts)
-        if isinstance(content, str) and content.strip():
-            label = "用戶" if role == "user" else "助手"
-            # 截斷過長的訊息
-            if len(content) > 200:
-                content = content[:200] + "..."
-            lines.append(f"{label}: {content}")
-
+    # 切片只複製尾端 max_messages 筆
+    recent = history[-max_messages:] if max_messages > 0 else history
+    lines = [
+        f"{'用戶' if msg.get('role') == 'user' else '助手'}: "
+        # 截斷過長的訊息
+        f"{text[:200] + '...' if len(text) > 200 else text}"
+        for msg in recent
+        if isinstance(msg, dict)
+        and (text := _message_text(msg.get("content", ""))).strip()
+    ]
     return "\n".join(lines) if lines else "（無最近訊息）"
 
 
@@ -103,7 +220,7 @@ async def predict_proactive_timing(
         just_cancelled_reason: 若剛才因為這條訊息取消了一個語境任務，
             傳入被取消任務的原因，讓 LLM 知道語境已轉移。
         llm_provider_id: 指定 LLM 平台 ID，留空則使用會話預設。
-        extra_prompt: 使用者自訂的補充提示，會附加到 prompt 末尾。
+        extra_prompt: 使用者自訂的補充提示，會附加到分析規則之後。
         persona_system_prompt: 目前會話的人格提示，放在分析規則前作為穩定快取前綴。
 
     Returns:
@@ -124,16 +241,17 @@ async def predict_proactive_timing(
             f"這表示之前的活動已結束或語境已轉移。）\n"
         )
 
-    prompt = PREDICT_TIMING_PROMPT.format(
+    prompt = _render_predict_timing(
         recent_messages=recent_str,
         current_time=current_time_str,
         last_message=last_message.strip(),
         cancelled_context=cancelled_context,
     )
 
-    # 附加使用者自訂的補充提示
+    # 使用者自訂的補充提示按會話固定，接在規則之後仍屬穩定的 system 前綴
+    operation_prompt = PREDICT_TIMING_SYSTEM
     if extra_prompt and extra_prompt.strip():
-        prompt += f"\n\n[補充指示]\n{extra_prompt.strip()}"
+        operation_prompt += f"\n\n[補充指示]\n{extra_prompt.strip()}"
 
     try:
         # 若指定了 LLM 平台 ID 則使用，否則使用會話預設
@@ -142,19 +260,21 @@ async def predict_proactive_timing(
             if llm_provider_id and llm_provider_id.strip()
             else await context.get_current_chat_provider_id(session_id)
         )
-        resp = await context.llm_generate(
-            chat_provider_id=provider_id,
+        completion, cache_key = await _generate_cached(
+            context,
+            provider_id=provider_id,
             prompt=prompt,
             system_prompt=build_cacheable_system_prompt(
-                persona_system_prompt, PREDICT_TIMING_SYSTEM
+                persona_system_prompt, operation_prompt
             ),
         )
-        if not resp or not resp.completion_text:
+        if not completion:
             return None
 
-        result = _parse_json_response(resp.completion_text)
+        result = _parse_json_response(completion)
         if not result:
             return None
+        _RESPONSE_CACHE.put(cache_key, completion)
 
         # 驗證並限制 delay_minutes 的範圍
         if result.get("should_schedule"):
@@ -227,7 +347,7 @@ async def check_should_cancel_tasks_batch(
         tasks_lines.append(f"{idx}. 原因：「{reason}」，提示：「{hint}」")
     tasks_list_str = "\n".join(tasks_lines)
 
-    prompt = CHECK_CANCEL_PROMPT.format(
+    prompt = _render_check_cancel(
         last_message=last_message.strip(),
         tasks_list=tasks_list_str,
     )
@@ -239,19 +359,21 @@ async def check_should_cancel_tasks_batch(
             if llm_provider_id and llm_provider_id.strip()
             else await context.get_current_chat_provider_id(session_id)
         )
-        resp = await context.llm_generate(
-            chat_provider_id=provider_id,
+        completion, cache_key = await _generate_cached(
+            context,
+            provider_id=provider_id,
             prompt=prompt,
             system_prompt=build_cacheable_system_prompt(
                 persona_system_prompt, CHECK_CANCEL_SYSTEM
             ),
         )
-        if not resp or not resp.completion_text:
+        if not completion:
             return {}
 
-        results = _parse_json_array_response(resp.completion_text)
+        results = _parse_json_array_response(completion)
         if not results:
             return {}
+        _RESPONSE_CACHE.put(cache_key, completion)
 
         # 解析結果並建立索引對應
         cancel_map: dict[int, tuple[bool, str]] = {}
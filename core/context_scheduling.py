@@ -17,6 +17,8 @@ import time
 from datetime import datetime
 from typing import TYPE_CHECKING
 
+from apscheduler.jobstores.base import JobLookupError
+
 from astrbot.api import logger
 
 from .config import get_context_analysis_provider_id, get_session_config
@@ -26,13 +28,15 @@ from .context_predictor import (
 )
 from .llm_helpers import get_current_system_prompt, load_conversation_history
 from .messaging import sanitize_history_content
-from .utils import get_session_log_str
+from .proactive_state import format_minute_time
+from .utils import get_session_log_str, is_contentless_message
 
 if TYPE_CHECKING:
     from ..main import ProactiveChatPlugin
 
 _LOG_TAG = "[主動訊息]"
 _RESTORE_MISSED_GRACE_SECONDS = 30 * 60
+_RUN_AT_FMT = "%Y-%m-%d %H:%M:%S"
 
 
 async def handle_context_aware_scheduling(
@@ -49,17 +53,33 @@ async def handle_context_aware_scheduling(
     2. 根據最新訊息執行 LLM 時機預測
     3. 若預測結果建議排程，建立一次性任務
     """
+    # 空白或純標點訊息既不會取消任務也不會觸發排程，連人格與歷史都不必讀取
+    if is_contentless_message(message_text):
+        logger.debug(
+            f"{_LOG_TAG} 訊息無可分析內容，略過語境分析 | session={session_id}"
+        )
+        return
     try:
+        # 配置在一次分析期間不會改變，查一次後傳給取消與建立步驟
+        session_config = get_session_config(plugin.config, session_id)
         persona_system_prompt = await get_current_system_prompt(
             plugin.context, session_id
         )
         # 步驟 1：順序執行，避免在 Core 正保存本輪對話時立刻並發讀 history。
         cancelled_reason = await maybe_cancel_pending_context_task(
-            plugin, session_id, message_text, persona_system_prompt
+            plugin,
+            session_id,
+            message_text,
+            persona_system_prompt,
+            session_config=session_config,
+        )
+        history = await get_history_for_prediction(
+            plugin,
+            session_id,
+            max_messages=ctx_settings.get("max_context_messages", 10),
         )
-        history = await get_history_for_prediction(plugin, session_id)
 
-        now_str = datetime.now(plugin.timezone).strftime("%Y年%m月%d日 %H:%M")
+        now_str = format_minute_time(time.time(), plugin.timezone)
 
         # 步驟 2：呼叫 LLM 預測時機（若剛取消了任務，傳入原因讓 LLM 知道語境已轉移）
         prediction = await predict_proactive_timing(
@@ -77,7 +97,6 @@ async def handle_context_aware_scheduling(
             persona_system_prompt=persona_system_prompt,
         )
 
-        session_config = get_session_config(plugin.config, session_id)
         log_name = get_session_log_str(session_id, session_config, plugin.session_data)
 
         if not prediction or not prediction.get("should_schedule"):
@@ -96,7 +115,7 @@ async def handle_context_aware_scheduling(
         logger.info(
             f"{_LOG_TAG} {log_name} "
             f"語境分析完成，LLM 判定需要排程主動訊息，"
-            f"預計觸發時間 {run_at.strftime('%Y-%m-%d %H:%M:%S')} "
+            f"預計觸發時間 {run_at.strftime(_RUN_AT_FMT)} "
             f"(+{delay_minutes}分鐘，原因: {reason})"
         )
 
@@ -107,6 +126,8 @@ async def handle_context_aware_scheduling(
             delay_minutes=delay_minutes,
             reason=reason,
             hint=hint,
+            run_at=run_at,
+            session_config=session_config,
         )
 
     except asyncio.CancelledError:
@@ -123,20 +144,26 @@ async def maybe_cancel_pending_context_task(
     session_id: str,
     message_text: str,
     persona_system_prompt: str = "",
+    *,
+    session_config: dict | None = None,
 ) -> str:
     """若用戶的新訊息使待執行的語境任務不再需要，則取消該任務。
 
     使用批量 LLM 請求一次性檢查所有待執行的語境任務。
+    *session_config* 未提供時自行查詢。
 
     Returns:
         被取消任務的原因字串（多個以分號分隔），未取消則回傳空字串。
     """
-    task_list = plugin._pending_context_tasks.get(session_id)
-    if not task_list:
+    task_map = plugin._pending_context_tasks.get(session_id)
+    if not task_map:
         return ""
+    # 批量檢查以索引對應任務，需固定一份順序快照
+    task_list = list(task_map.values())
 
     # 從會話配置中取得語境感知的 LLM 平台 ID
-    session_config = get_session_config(plugin.config, session_id)
+    if session_config is None:
+        session_config = get_session_config(plugin.config, session_id)
     ctx_llm_id = get_context_analysis_provider_id(plugin.config, session_config)
 
     # 批量檢查所有待執行任務（一次 LLM 請求）
@@ -168,22 +195,17 @@ async def maybe_cancel_pending_context_task(
             )
 
     if to_remove:
-        original_tasks = list(task_list)
+        original_tasks = dict(task_map)
         remove_job_ids = {str(task.get("job_id", "")) for task in to_remove}
-        remaining_tasks = [
-            task
-            for task in task_list
-            if str(task.get("job_id", "")) not in remove_job_ids
-        ]
         async with plugin.data_lock:
             try:
-                if remaining_tasks:
-                    plugin._pending_context_tasks[session_id] = remaining_tasks
-                else:
+                for job_id in remove_job_ids:
+                    task_map.pop(job_id, None)
+                if not task_map:
                     plugin._pending_context_tasks.pop(session_id, None)
                 sd = plugin.session_data.setdefault(session_id, {})
-                if remaining_tasks:
-                    sd["pending_context_tasks"] = remaining_tasks
+                if task_map:
+                    sd["pending_context_tasks"] = list(task_map.values())
                 else:
                     sd.pop("pending_context_tasks", None)
                     sd.pop("pending_context_task", None)
@@ -194,8 +216,10 @@ async def maybe_cancel_pending_context_task(
 
         for job_id in remove_job_ids:
             try:
-                if job_id and plugin.scheduler.get_job(job_id):
+                if job_id:
                     plugin.scheduler.remove_job(job_id)
+            except JobLookupError:
+                pass
             except Exception as e:
                 logger.debug(
                     f"{_LOG_TAG} maybe_cancel_pending_context_task 移除排程任務失敗"
@@ -212,39 +236,45 @@ async def create_context_predicted_task(
     delay_minutes: int,
     reason: str,
     hint: str,
+    run_at: datetime | None = None,
+    session_config: dict | None = None,
 ) -> None:
     """
     根據 LLM 預測結果建立一次性排程任務。
 
     支援同一會話同時存在多個語境任務（如短期跟進 + 長期早安問候），
-    每個任務使用唯一的 job_id。
+    每個任務使用唯一的 job_id。呼叫端已算好觸發時間或已查好會話配置時，
+    可經 *run_at* 與 *session_config* 傳入。
     """
-    run_at = datetime.fromtimestamp(
-        time.time() + delay_minutes * 60, tz=plugin.timezone
-    )
+    created_at = time.time()
+    if run_at is None:
+        run_at = datetime.fromtimestamp(
+            created_at + delay_minutes * 60, tz=plugin.timezone
+        )
 
     # 生成唯一 job_id
     plugin._ctx_task_counter += 1
     ctx_job_id = f"ctx_{session_id}_{plugin._ctx_task_counter}"
 
-    session_config = get_session_config(plugin.config, session_id)
+    if session_config is None:
+        session_config = get_session_config(plugin.config, session_id)
 
-    # 追蹤待執行任務（追加到列表）
+    # 追蹤待執行任務（以 job_id 為鍵加入）
     task_info = {
         "job_id": ctx_job_id,
         "reason": reason,
         "hint": hint,
         "delay_minutes": delay_minutes,
-        "created_at": time.time(),
+        "created_at": created_at,
         "run_at": run_at.isoformat(),
     }
-    task_list = plugin._pending_context_tasks.setdefault(session_id, [])
-    task_list.append(task_info)
+    task_map = plugin._pending_context_tasks.setdefault(session_id, {})
+    task_map[ctx_job_id] = task_info
 
     # 持久化到 session_data
     async with plugin.data_lock:
         sd = plugin.session_data.setdefault(session_id, {})
-        sd["pending_context_tasks"] = task_list
+        sd["pending_context_tasks"] = list(task_map.values())
         sd.pop("pending_context_task", None)  # 清理舊格式
         await plugin._save_data()
 
@@ -261,11 +291,10 @@ async def create_context_predicted_task(
         )
     except Exception:
         async with plugin.data_lock:
-            if task_info in task_list:
-                task_list.remove(task_info)
+            task_map.pop(ctx_job_id, None)
             sd = plugin.session_data.setdefault(session_id, {})
-            if task_list:
-                sd["pending_context_tasks"] = task_list
+            if task_map:
+                sd["pending_context_tasks"] = list(task_map.values())
             else:
                 plugin._pending_context_tasks.pop(session_id, None)
                 sd.pop("pending_context_tasks", None)
@@ -276,17 +305,24 @@ async def create_context_predicted_task(
         f"{_LOG_TAG} 已為 "
         f"{get_session_log_str(session_id, session_config, plugin.session_data)} "
         f"建立語境預測排程，"
-        f"觸發時間 {run_at.strftime('%Y-%m-%d %H:%M:%S')} "
+        f"觸發時間 {run_at.strftime(_RUN_AT_FMT)} "
         f"(+{delay_minutes}分鐘，原因: {reason})"
     )
 
 
 async def get_history_for_prediction(
-    plugin: ProactiveChatPlugin, session_id: str
+    plugin: ProactiveChatPlugin, session_id: str, *, max_messages: int = 0
 ) -> list:
-    """取得最近的對話歷史，用於語境預測。"""
+    """取得最近的對話歷史，用於語境預測。
+
+    *max_messages* 大於 0 時只清洗尾端這幾筆，預測本就只讀取最近的訊息。
+    """
     _, history = await load_conversation_history(plugin.context, session_id)
-    return sanitize_history_content(history) if history else []
+    if not history:
+        return []
+    if max_messages > 0:
+        history = history[-max_messages:]
+    return sanitize_history_content(history)
 
 
 def restore_pending_context_tasks(plugin: ProactiveChatPlugin) -> bool:
@@ -311,7 +347,8 @@ def restore_pending_context_tasks(plugin: ProactiveChatPlugin) -> bool:
         if raw is None:
             continue
         task_list = raw if isinstance(raw, list) else [raw]
-        valid_tasks: list[dict] = []
+        # 以 job_id 去重（保留第一筆），記憶體索引與寫回的列表保持一致
+        tasks_by_id: dict[str, dict] = {}
         for pending in task_list:
             if not isinstance(pending, dict):
                 continue
@@ -325,7 +362,7 @@ def restore_pending_context_tasks(plugin: ProactiveChatPlugin) -> bool:
                 continue
 
             job_id = str(pending.get("job_id") or "").strip()
-            if not job_id:
+            if not job_id or job_id in tasks_by_id:
                 continue
 
             suffix = job_id.rsplit("_", 1)[-1]
@@ -342,7 +379,7 @@ def restore_pending_context_tasks(plugin: ProactiveChatPlugin) -> bool:
 
             try:
                 if plugin.scheduler and plugin.scheduler.get_job(job_id):
-                    valid_tasks.append(pending)
+                    tasks_by_id[job_id] = pending
                     restored += 1
                 elif plugin.scheduler:
                     plugin.scheduler.add_job(
@@ -356,7 +393,7 @@ def restore_pending_context_tasks(plugin: ProactiveChatPlugin) -> bool:
                         misfire_grace_time=120,
                     )
                     scheduled += 1
-                    valid_tasks.append(pending)
+                    tasks_by_id[job_id] = pending
                     restored += 1
                 else:
                     needs_save = True
@@ -366,17 +403,21 @@ def restore_pending_context_tasks(plugin: ProactiveChatPlugin) -> bool:
                     f" | session={sid}, job_id={job_id}: {e}"
                 )
                 needs_save = True
-        # 檢查是否有任務被過濾掉（過期任務被清理）
-        if len(valid_tasks) != len(task_list):
+        # 檢查是否有任務被過濾掉（過期、無效或重複的任務被清理）
+        valid_tasks = list(tasks_by_id.values())
+        filtered = len(valid_tasks) != len(task_list)
+        if filtered:
             needs_save = True
-        if valid_tasks:
-            plugin._pending_context_tasks[sid] = valid_tasks
+        if tasks_by_id:
+            plugin._pending_context_tasks[sid] = tasks_by_id
         # 清理舊格式的持久化 key
         if "pending_context_task" in info:
             info.pop("pending_context_task", None)
             needs_save = True
         if valid_tasks:
-            info["pending_context_tasks"] = valid_tasks
+            # 任務全數保留且本就存於新格式 key 時，原列表已持有相同的 dict
+            if filtered or info.get("pending_context_tasks") is not raw:
+                info["pending_context_tasks"] = valid_tasks
         else:
             if "pending_context_tasks" in info:
                 info.pop("pending_context_tasks", None)
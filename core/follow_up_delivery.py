@@ -110,6 +110,13 @@ async def deliver_and_finalize(
 ) -> bool:
     from .delivery import DispatchStatus, GateVerdict
 
+    sent_at: float | None = None
+
+    def set_bot_message_time(value: float) -> None:
+        nonlocal sent_at
+        sent_at = value
+        plugin.last_bot_message_time = value
+
     initial = await dispatch(
         session_id=session_id,
         text=response_text,
@@ -117,9 +124,7 @@ async def deliver_and_finalize(
         context=plugin.context,
         session_data=plugin.session_data,
         reset_group_silence_cb=plugin._reset_group_silence_timer,
-        last_bot_message_time_setter=lambda value: setattr(
-            plugin, "last_bot_message_time", value
-        ),
+        last_bot_message_time_setter=set_bot_message_time,
         gate_check=lambda: plugin._gate_verdict(gate),
     )
     if initial.status is DispatchStatus.FAILED:
@@ -140,6 +145,9 @@ async def deliver_and_finalize(
     }
     if next_check_minutes is not None:
         finalize_options["next_check_minutes"] = next_check_minutes
+    if sent_at is not None:
+        # 下次排程與 Bot 發言時間共用同一次時鐘讀取
+        finalize_options["now"] = sent_at
     finalized = await finalize(
         plugin,
         session_id,
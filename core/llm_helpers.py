@@ -10,13 +10,14 @@ from __future__ import annotations
 
 import asyncio
 import json
+import re
 from typing import TYPE_CHECKING, Any
 
 from astrbot.api import logger, sp
 from astrbot.core.agent.context.truncator import ContextTruncator
 from astrbot.core.agent.message import Message
 
-from .utils import async_with_umo_fallback
+from .utils import async_with_umo_fallback, is_sqlite_lock_error
 
 if TYPE_CHECKING:
     from astrbot.core.star.context import Context
@@ -29,10 +30,12 @@ _LIVINGMEMORY_NAMES = {
     "livingmemory",
     "astrbot_plugin_livingmemory",
 }
-_SQLITE_LOCK_KEYWORDS = frozenset({"database is locked", "database table is locked"})
-_AUTH_ERROR_KEYWORDS = frozenset(
-    {"authentication", "auth", "unauthorized", "forbidden"}
-)
+# "auth" 已涵蓋 authentication / unauthorized，單次不分大小寫掃描即可
+_RE_AUTH_ERROR = re.compile(r"auth|forbidden", re.IGNORECASE)
+_MEMORY_HEADER = "[相關記憶（來自長期記憶）]"
+_MEMORY_SNIPPET_LIMIT = 200
+# 去重比對的前綴長度：開頭一致即視為同一條記憶
+_MEMORY_DEDUP_PREFIX = 128
 
 
 def build_cacheable_system_prompt(
@@ -54,13 +57,8 @@ class NonRetryableLLMError(RuntimeError):
     """LLM 發生不可重試錯誤，避免主動訊息排程無限重試。"""
 
 
-def _is_sqlite_lock_error(exc: Exception) -> bool:
-    return any(keyword in str(exc).lower() for keyword in _SQLITE_LOCK_KEYWORDS)
-
-
 def _is_auth_error(exc: Exception) -> bool:
-    error_text = f"{type(exc).__name__} {exc}".lower()
-    return any(keyword in error_text for keyword in _AUTH_ERROR_KEYWORDS)
+    return _RE_AUTH_ERROR.search(f"{type(exc).__name__} {exc}") is not None
 
 
 async def _retry_core_conversation_call(
@@ -75,7 +73,7 @@ async def _retry_core_conversation_call(
         try:
             return await call()
         except Exception as e:
-            if not _is_sqlite_lock_error(e):
+            if not is_sqlite_lock_error(e):
                 raise
             if attempt >= attempts:
                 raise CoreHistoryBusy(str(e)) from e
@@ -115,27 +113,37 @@ def get_livingmemory_engine(context: Context) -> MemoryEngine | None:
         MemoryEngine 實例，找不到或未初始化時回傳 None。
     """
     try:
-        initializer = _find_livingmemory_initializer(context)
-        engine = _engine_from_initializer(initializer)
-        if engine:
-            return engine
-        if initializer:
-            logger.info(
-                f"{_LOG_TAG} livingmemory 插件尚未完成初始化，暫時跳過記憶檢索。"
-            )
+        return _ready_livingmemory_engine(_find_livingmemory_initializer(context))
     except Exception as e:
         logger.info(f"{_LOG_TAG} 取得 livingmemory 引擎失敗: {e}")
     return None
 
 
+def _ready_livingmemory_engine(initializer: Any) -> MemoryEngine | None:
+    engine = _engine_from_initializer(initializer)
+    if engine:
+        return engine
+    if initializer:
+        logger.info(f"{_LOG_TAG} livingmemory 插件尚未完成初始化，暫時跳過記憶檢索。")
+    return None
+
+
 async def get_livingmemory_engine_async(context: Context) -> MemoryEngine | None:
     """取得 livingmemory 的 MemoryEngine，必要時短暫等待其初始化完成。"""
-    engine = get_livingmemory_engine(context)
+    try:
+        initializer = _find_livingmemory_initializer(context)
+    except Exception as e:
+        logger.info(f"{_LOG_TAG} 取得 livingmemory 引擎失敗: {e}")
+        return None
+    return await _wait_livingmemory_engine(initializer)
+
+
+async def _wait_livingmemory_engine(initializer: Any) -> MemoryEngine | None:
+    engine = _ready_livingmemory_engine(initializer)
     if engine:
         return engine
 
     try:
-        initializer = _find_livingmemory_initializer(context)
         ensure_initialized = getattr(initializer, "ensure_initialized", None)
         if callable(ensure_initialized):
             await ensure_initialized(timeout=10.0)
@@ -152,29 +160,12 @@ async def get_livingmemory_engine_async(context: Context) -> MemoryEngine | None
     return None
 
 
-def _get_livingmemory_filtering_settings(context: Context) -> dict[str, Any]:
-    initializer = _find_livingmemory_initializer(context)
+def _get_livingmemory_filtering_settings(initializer: Any) -> dict[str, Any]:
     config_manager = getattr(initializer, "config_manager", None)
     filtering_settings = getattr(config_manager, "filtering_settings", None)
     return filtering_settings if isinstance(filtering_settings, dict) else {}
 
 
-def _uses_persona_filtering(context: Context) -> bool:
-    filtering_settings = _get_livingmemory_filtering_settings(context)
-    return filtering_settings.get("use_persona_filtering", True)
-
-
-def _uses_session_filtering(context: Context) -> bool:
-    filtering_settings = _get_livingmemory_filtering_settings(context)
-    return filtering_settings.get("use_session_filtering", True)
-
-
-def _recall_session_id(context: Context, session_id: str) -> str | None:
-    if _uses_session_filtering(context):
-        return session_id
-    return None
-
-
 async def resolve_persona_id_for_session(
     context: Context, session_id: str
 ) -> str | None:
@@ -264,19 +255,30 @@ async def recall_memories_for_proactive(
         logger.info(f"{_LOG_TAG} memory_top_k={memory_top_k}，已停用記憶檢索。")
         return ""
 
-    engine = await get_livingmemory_engine_async(context)
+    # 每次檢索只掃描一次插件列表，引擎與過濾設定共用同一個 initializer
+    try:
+        initializer = _find_livingmemory_initializer(context)
+    except Exception as e:
+        logger.info(f"{_LOG_TAG} 取得 livingmemory 引擎失敗: {e}")
+        initializer = None
+    engine = await _wait_livingmemory_engine(initializer) if initializer else None
     if not engine:
         logger.info(f"{_LOG_TAG} livingmemory 不可用，跳過記憶檢索。")
         return ""
 
+    filtering_settings = _get_livingmemory_filtering_settings(initializer)
     try:
         results = await engine.search_memories(
             query=query,
             k=memory_top_k,
-            session_id=_recall_session_id(context, session_id),
+            session_id=(
+                session_id
+                if filtering_settings.get("use_session_filtering", True)
+                else None
+            ),
             persona_id=(
                 await resolve_persona_id_for_session(context, session_id)
-                if _uses_persona_filtering(context)
+                if filtering_settings.get("use_persona_filtering", True)
                 else None
             ),
         )
@@ -284,14 +286,7 @@ async def recall_memories_for_proactive(
             logger.info(f"{_LOG_TAG} livingmemory 中未找到 {session_id} 的相關記憶。")
             return ""
 
-        lines = ["[相關記憶（來自長期記憶）]"]
-        for i, mem in enumerate(results, 1):
-            content = mem.content if hasattr(mem, "content") else str(mem)
-            if len(content) > 200:
-                content = content[:200] + "..."
-            lines.append(f"- 記憶 {i}: {content}")
-
-        memory_str = "\n".join(lines)
+        memory_str = _format_recalled_memories(results)
         logger.info(f"{_LOG_TAG} 已為 {session_id} 檢索到 {len(results)} 條相關記憶。")
         return memory_str
 
@@ -300,6 +295,34 @@ async def recall_memories_for_proactive(
         return ""
 
 
+def _format_recalled_memories(results: list) -> str:
+    """將檢索結果格式化為注入文字，單次 join 組出整段。
+
+    開頭內容相同的記憶只保留檢索排序較前的一條，避免重複內容佔用上下文。
+    """
+    limit = _MEMORY_SNIPPET_LIMIT
+    seen: set[str] = set()
+    snippets: list[str] = []
+    for mem in results:
+        content = getattr(mem, "content", None)
+        if not isinstance(content, str):
+            content = str(mem)
+        key = content[:_MEMORY_DEDUP_PREFIX].strip().casefold()
+        if key in seen:
+            continue
+        seen.add(key)
+        snippets.append(
+            content if len(content) <= limit else f"{content[:limit]}..."
+        )
+
+    return "\n".join(
+        (
+            _MEMORY_HEADER,
+            *(f"- 記憶 {i}: {text}" for i, text in enumerate(snippets, 1)),
+        )
+    )
+
+
 async def load_conversation_history(
     context: Context,
     session_id: str,
@@ -313,6 +336,19 @@ async def load_conversation_history(
     Returns:
         (conv_id, history)；無法取得時回傳 ("", [])。
     """
+    conv_id, _, history = await _load_conversation(
+        context, session_id, raise_on_busy=raise_on_busy
+    )
+    return (conv_id, history)
+
+
+async def _load_conversation(
+    context: Context,
+    session_id: str,
+    *,
+    raise_on_busy: bool = False,
+) -> tuple[str, Any, list]:
+    """同 :func:`load_conversation_history`，另回傳 conversation 物件供解析人格。"""
     try:
         conv_id = await _retry_core_conversation_call(
             "get_curr_conversation_id",
@@ -320,7 +356,7 @@ async def load_conversation_history(
             lambda: context.conversation_manager.get_curr_conversation_id(session_id),
         )
         if not conv_id:
-            return ("", [])
+            return ("", None, [])
 
         conversation = await _retry_core_conversation_call(
             "get_conversation",
@@ -328,7 +364,7 @@ async def load_conversation_history(
             lambda: context.conversation_manager.get_conversation(session_id, conv_id),
         )
         if not conversation or not conversation.history:
-            return (conv_id, [])
+            return (conv_id, conversation, [])
 
         history: list = []
         try:
@@ -340,17 +376,17 @@ async def load_conversation_history(
         except (json.JSONDecodeError, TypeError):
             pass
 
-        return (conv_id, history if history else [])
+        return (conv_id, conversation, history if history else [])
     except CoreHistoryBusy as e:
         if raise_on_busy:
             raise
         logger.info(
             f"{_LOG_TAG} AstrBot 對話歷史忙碌，略過本次讀取 | session={session_id}: {e}"
         )
-        return ("", [])
+        return ("", None, [])
     except Exception as e:
         logger.debug(f"{_LOG_TAG} 載入對話歷史失敗 | session={session_id}: {e}")
-        return ("", [])
+        return ("", None, [])
 
 
 async def prepare_llm_request(context: Context, session_id: str) -> dict | None:
@@ -361,7 +397,7 @@ async def prepare_llm_request(context: Context, session_id: str) -> dict | None:
         若無法取得則回傳 None。
     """
     try:
-        conv_id, history = await load_conversation_history(
+        conv_id, conversation, history = await _load_conversation(
             context, session_id, raise_on_busy=True
         )
         if not conv_id:
@@ -389,13 +425,15 @@ async def prepare_llm_request(context: Context, session_id: str) -> dict | None:
         if not conv_id:
             return None
 
-        # 若 load_conversation_history 回傳了 conv_id 但 history 為空，
-        # 仍需取得 conversation 以解析 system_prompt
-        conversation = await _retry_core_conversation_call(
-            "get_conversation",
-            session_id,
-            lambda: context.conversation_manager.get_conversation(session_id, conv_id),
-        )
+        # 既有對話已在載入歷史時取得；僅新建的對話需要再查一次以解析 system_prompt
+        if conversation is None:
+            conversation = await _retry_core_conversation_call(
+                "get_conversation",
+                session_id,
+                lambda: context.conversation_manager.get_conversation(
+                    session_id, conv_id
+                ),
+            )
 
         system_prompt = await resolve_system_prompt(context, conversation, session_id)
         if not system_prompt:
@@ -22,7 +22,7 @@ from astrbot.core.platform.message_type import MessageType
 from astrbot.core.star.star_handler import EventType, star_handlers_registry
 
 from .delivery import GateVerdict
-from .utils import MSG_TYPE_KEYWORD_GROUP, parse_session_id
+from .utils import EMPTY_MAPPING, MSG_TYPE_KEYWORD_GROUP, parse_session_id
 
 if TYPE_CHECKING:
     from astrbot.core.star.context import Context
@@ -32,6 +32,10 @@ _LOG_TAG = "[主動訊息]"
 # 預編譯預設分段正則
 _DEFAULT_SPLIT_RE = re.compile(r".*?[。？！~…\n]+|.+$")
 _RE_LEADING_NOISE = re.compile(r"^\s*(?:[õÕ]+\s*)+")
+# 與 str.isalnum() 互補：刪除後剩下的字元數即英數字元數
+_RE_NON_ALNUM = re.compile(r"[\W_]+")
+_DEFAULT_SPLIT_WORDS = ("。", "？", "！", "~", "…")
+_DEFAULT_INTERVAL_RANGE = (1.5, 3.5)
 
 
 # ── 裝飾鉤子 ─────────────────────────────────────────────
@@ -44,20 +48,27 @@ async def trigger_decorating_hooks(
     session_data: dict,
 ) -> list:
     """觸發 ``OnDecoratingResultEvent``，讓其他插件有機會處理訊息。"""
+    # 沒有任何裝飾鉤子時（常見情況）不必構建模擬事件
+    handlers = star_handlers_registry.get_handlers_by_event_type(
+        EventType.OnDecoratingResultEvent
+    )
+    if not handlers:
+        return chain
+
     parsed = parse_session_id(session_id)
     if not parsed:
         return chain
 
     platform_name, msg_type_str, target_id = parsed
 
-    # 查找平台實例（先 id 後 name）
-    platform_inst = None
+    # 查找平台（先 id 後 name），保留命中的 meta 供模擬事件使用
+    platform_meta = None
     for p in context.platform_manager.get_insts():
         meta = p.meta()
         if meta.id == platform_name or meta.name == platform_name:
-            platform_inst = p
+            platform_meta = meta
             break
-    if not platform_inst:
+    if platform_meta is None:
         return chain
 
     # 構建模擬事件
@@ -68,7 +79,7 @@ async def trigger_decorating_hooks(
         msg_obj.group = Group(group_id=target_id)
     msg_obj.session_id = target_id
     msg_obj.message = chain
-    msg_obj.self_id = session_data.get(session_id, {}).get("self_id", "bot")
+    msg_obj.self_id = session_data.get(session_id, EMPTY_MAPPING).get("self_id", "bot")
     msg_obj.sender = MessageMember(user_id=target_id)
     msg_obj.message_str = ""
     msg_obj.raw_message = None
@@ -77,16 +88,14 @@ async def trigger_decorating_hooks(
     event = AstrMessageEvent(
         message_str="",
         message_obj=msg_obj,
-        platform_meta=platform_inst.meta(),
+        platform_meta=platform_meta,
         session_id=target_id,
     )
     res = MessageEventResult()
     res.chain = chain
     event.set_result(res)
 
-    for handler in star_handlers_registry.get_handlers_by_event_type(
-        EventType.OnDecoratingResultEvent
-    ):
+    for handler in handlers:
         try:
             await handler.handler(event)
         except Exception as e:
@@ -162,6 +171,21 @@ def _compile_split_regex(pattern: str) -> re.Pattern[str] | None:
         return None
 
 
+@functools.lru_cache(maxsize=32)
+def _compile_words_split_regex(split_words: frozenset[str]) -> re.Pattern[str] | None:
+    """將分段字元集合編譯為正則，讓逐字掃描交由 re 引擎完成。
+
+    只有單一字元能作為分段點；沒有可用字元時回傳 None（整段發送）。
+    """
+    chars = "".join(
+        sorted(w for w in split_words if isinstance(w, str) and len(w) == 1)
+    )
+    if not chars:
+        return None
+    cls = re.escape(chars)
+    return re.compile(f"[^{cls}]*[{cls}]|[^{cls}]+")
+
+
 def split_text(text: str, settings: dict) -> list[str]:
     """根據配置將文本分段。"""
     mode = settings.get("split_mode", "regex")
@@ -177,22 +201,18 @@ def split_text(text: str, settings: dict) -> list[str]:
         segments = pat.findall(text)
         return [s.strip() for s in segments if s.strip()] or [text]
 
-    # words 模式
-    split_chars = set(settings.get("split_words", ["。", "？", "！", "~", "…"]))
-    segments: list[str] = []
-    buf: list[str] = []
-    for ch in text:
-        buf.append(ch)
-        if ch in split_chars:
-            s = "".join(buf).strip()
-            if s:
-                segments.append(s)
-            buf.clear()
-    if buf:
-        s = "".join(buf).strip()
-        if s:
-            segments.append(s)
-    return segments or [text]
+    # words 模式：每個分段字元各自結束一段，尾端剩餘文字自成一段
+    pat = _compile_words_split_regex(
+        frozenset(settings.get("split_words", _DEFAULT_SPLIT_WORDS))
+    )
+    segments = pat.findall(text) if pat is not None else [text]
+    return [s.strip() for s in segments if s.strip()] or [text]
+
+
+@functools.lru_cache(maxsize=16)
+def _inv_log(base: float) -> float:
+    """快取 ``1 / ln(base)``，將換底對數化為一次 log 與一次乘法。"""
+    return 1.0 / math.log(base)
 
 
 def calc_segment_interval(text: str, settings: dict) -> float:
@@ -200,35 +220,53 @@ def calc_segment_interval(text: str, settings: dict) -> float:
     if settings.get("interval_method") == "log":
         base = float(settings.get("log_base", 1.8))
         # ASCII → 按空格分詞；非 ASCII → 按字元計數
-        n = len(text.split()) if text.isascii() else sum(c.isalnum() for c in text)
-        val = math.log(n + 1, base)
+        n = len(text.split()) if text.isascii() else len(_RE_NON_ALNUM.sub("", text))
+        val = math.log1p(n) * _inv_log(base)
         return random.uniform(val, val + 0.5)
 
     # random 模式
-    raw = settings.get("interval", "1.5,3.5")
+    lo, hi = _parse_interval_range(settings.get("interval", "1.5,3.5"))
+    return random.uniform(lo, hi)
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_interval_range(raw: str) -> tuple[float, float]:
+    """快取解析 ``"下限,上限"`` 格式的隨機間隔；格式無效時回退預設值。"""
     try:
         parts = [float(x) for x in raw.replace(" ", "").split(",")]
-        lo, hi = (parts[0], parts[1]) if len(parts) == 2 else (1.5, 3.5)
-    except (ValueError, IndexError):
-        lo, hi = 1.5, 3.5
-    return random.uniform(lo, hi)
+    except ValueError:
+        return _DEFAULT_INTERVAL_RANGE
+    return (parts[0], parts[1]) if len(parts) == 2 else _DEFAULT_INTERVAL_RANGE
 
 
 # ── 歷史清洗 ─────────────────────────────────────────────
 
 
+def _is_canonical_content(content) -> bool:
+    if content is None or isinstance(content, str):
+        return True
+    return isinstance(content, list) and all(isinstance(p, dict) for p in content)
+
+
 def sanitize_history_content(history: list) -> list:
-    """清洗歷史記錄，確保 content 欄位格式一致。"""
+    """清洗歷史記錄，確保 content 欄位格式一致。
+
+    只複製需要改寫的項目；若所有項目皆已是規範格式，直接回傳原列表。
+    """
     if not history:
         return []
 
-    result: list[dict] = []
-    for item in history:
+    result: list | None = None
+    for index, item in enumerate(history):
         if not isinstance(item, dict):
-            result.append(item)
             continue
+        content = item.get("content")
+        if _is_canonical_content(content):
+            continue
+        if result is None:
+            # 首次遇到需改寫的項目才建立新列表，前面的項目原樣沿用
+            result = history[:]
         entry = item.copy()
-        content = entry.get("content")
         if isinstance(content, list):
             entry["content"] = [
                 p
@@ -236,7 +274,7 @@ def sanitize_history_content(history: list) -> list:
                 else {"type": "text", "text": p if isinstance(p, str) else str(p)}
                 for p in content
             ]
-        elif content is not None and not isinstance(content, str):
+        else:
             entry["content"] = str(content)
-        result.append(entry)
-    return result
+        result[index] = entry
+    return history if result is None else result
@@ -226,22 +226,17 @@ class PluginPageApi:
             raise ValueError("排程器尚未啟動")
 
         async with self.plugin.data_lock:
-            found = False
-            for task in self.plugin._pending_context_tasks.get(session_id, []):
-                if isinstance(task, dict) and str(task.get("job_id", "")) == task_id:
-                    task["run_at"] = run_date.isoformat()
-                    if description:
-                        task["description"] = description
-                    else:
-                        task.pop("description", None)
-                    found = True
-                    break
-            if not found:
+            tasks = self.plugin._pending_context_tasks.get(session_id, {})
+            task = tasks.get(task_id)
+            if task is None:
                 raise ValueError("找不到指定語境任務")
+            task["run_at"] = run_date.isoformat()
+            if description:
+                task["description"] = description
+            else:
+                task.pop("description", None)
             sd = self.plugin.session_data.setdefault(session_id, {})
-            sd["pending_context_tasks"] = self.plugin._pending_context_tasks.get(
-                session_id, []
-            )
+            sd["pending_context_tasks"] = list(tasks.values())
             await self.plugin._save_data()
         self.plugin.scheduler.add_job(
             self.plugin.check_and_chat,
@@ -328,14 +323,11 @@ class PluginPageApi:
             scheduler_has_job = bool(
                 self.plugin.scheduler and self.plugin.scheduler.get_job(task_id)
             )
-            original_pending = list(
-                self.plugin._pending_context_tasks.get(session_id, [])
+            original_pending = dict(
+                self.plugin._pending_context_tasks.get(session_id, {})
             )
-            new_pending = [
-                task
-                for task in original_pending
-                if not isinstance(task, dict) or str(task.get("job_id", "")) != task_id
-            ]
+            new_pending = dict(original_pending)
+            new_pending.pop(task_id, None)
             removed = len(new_pending) != len(original_pending) or scheduler_has_job
             if not removed:
                 raise ValueError("找不到可刪除的任務")
@@ -348,7 +340,7 @@ class PluginPageApi:
                     sd = self.plugin.session_data.get(session_id)
                     if isinstance(sd, dict):
                         if new_pending:
-                            sd["pending_context_tasks"] = new_pending
+                            sd["pending_context_tasks"] = list(new_pending.values())
                         else:
                             sd.pop("pending_context_tasks", None)
                             sd.pop("pending_context_task", None)
@@ -441,24 +433,16 @@ class PluginPageApi:
                 await self.plugin._save_data()
         elif task_type == "context":
             async with self.plugin.data_lock:
-                found = False
-                for task in self.plugin._pending_context_tasks.get(session_id, []):
-                    if (
-                        isinstance(task, dict)
-                        and str(task.get("job_id", "")) == task_id
-                    ):
-                        if description:
-                            task["description"] = description
-                        else:
-                            task.pop("description", None)
-                        found = True
-                        break
-                if not found:
+                tasks = self.plugin._pending_context_tasks.get(session_id, {})
+                task = tasks.get(task_id)
+                if task is None:
                     raise ValueError("找不到指定語境任務")
+                if description:
+                    task["description"] = description
+                else:
+                    task.pop("description", None)
                 sd = self.plugin.session_data.setdefault(session_id, {})
-                sd["pending_context_tasks"] = self.plugin._pending_context_tasks.get(
-                    session_id, []
-                )
+                sd["pending_context_tasks"] = list(tasks.values())
                 await self.plugin._save_data()
         elif task_type == "habit":
             async with self.plugin.data_lock:
@@ -507,15 +491,11 @@ class PluginPageApi:
     def _remove_context_task(self, session_id: str, task_id: str) -> bool:
         if not session_id or session_id not in self.plugin._pending_context_tasks:
             return False
-        before = len(self.plugin._pending_context_tasks[session_id])
-        self.plugin._pending_context_tasks[session_id] = [
-            task
-            for task in self.plugin._pending_context_tasks[session_id]
-            if not isinstance(task, dict) or str(task.get("job_id", "")) != task_id
-        ]
-        if not self.plugin._pending_context_tasks[session_id]:
+        tasks = self.plugin._pending_context_tasks[session_id]
+        removed = tasks.pop(task_id, None) is not None
+        if not tasks:
             self.plugin._pending_context_tasks.pop(session_id, None)
-        return len(self.plugin._pending_context_tasks.get(session_id, [])) != before
+        return removed
 
     def _cancel_timer_task(self, task_type: str, session_id: str) -> bool:
         timers = {
@@ -704,10 +684,7 @@ class PluginPageApi:
 
         for session_id, tasks in self.plugin._pending_context_tasks.items():
             session_config = get_session_config(self.plugin.config, session_id)
-            for task in tasks:
-                if not isinstance(task, dict):
-                    continue
-                job_id = str(task.get("job_id", ""))
+            for job_id, task in tasks.items():
                 tracked_job_ids.add(job_id)
                 job = scheduler_index.get(job_id)
                 run_at = self._parse_datetime(task.get("run_at"))
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import asyncio
-import traceback
 from collections.abc import Awaitable, Callable
 from typing import TYPE_CHECKING
 from uuid import uuid4
@@ -13,6 +12,7 @@ from astrbot.core.db.po import ConversationV2
 from sqlmodel import col, select, text, update
 
 from .delivery import AcceptedTurn, DispatchGate, GateVerdict, accepted_turn_text
+from .utils import is_sqlite_lock_error
 
 if TYPE_CHECKING:
     from ..main import ProactiveChatPlugin
@@ -23,7 +23,6 @@ SettleMarker = Callable[..., Awaitable[None]]
 
 _LOG_TAG = "[主動訊息]"
 _MARKER_KEY = "_astrbot_proactive_history_entry_id"
-_SQLITE_LOCK_KEYWORDS = frozenset({"database is locked", "database table is locked"})
 
 
 def _allows_history(plugin: ProactiveChatPlugin, gate: DispatchGate) -> bool:
@@ -92,9 +91,7 @@ async def save_conversation_history(
                     plugin, conv_id, user_prompt, assistant_response, gate
                 )
             except Exception as error:
-                error_text = "".join(traceback.format_exception(error)).lower()
-                locked = any(word in error_text for word in _SQLITE_LOCK_KEYWORDS)
-                if not locked:
+                if not is_sqlite_lock_error(error):
                     logger.warning(f"{_LOG_TAG} 主動訊息寫回歷史失敗，已跳過: {error}")
                     return False
                 if attempt > retry_attempts:
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import functools
+import re
 import time
-import traceback
 import zoneinfo
 from datetime import datetime
 from typing import TYPE_CHECKING, assert_never
@@ -25,6 +26,7 @@ from .scheduler import (
     should_trigger_by_unanswered,
 )
 from .utils import (
+    EMPTY_MAPPING,
     get_session_log_str,
     is_group_session_id,
 )
@@ -33,9 +35,9 @@ if TYPE_CHECKING:
     from ..main import ProactiveChatPlugin
 
 _LOG_TAG = "[主動訊息]"
-_AUTH_ERROR_KEYWORDS = frozenset(
-    {"authentication", "auth", "unauthorized", "forbidden"}
-)
+# "auth" 已涵蓋 authentication / unauthorized，單次不分大小寫掃描即可
+_RE_AUTH_ERROR = re.compile(r"auth|forbidden", re.IGNORECASE)
+_TIME_FMT = "%Y年%m月%d日 %H:%M"
 
 
 def is_habit_job(job_id: str) -> bool:
@@ -47,12 +49,11 @@ def find_context_task(
 ) -> dict | None:
     if not ctx_job_id:
         return None
-    task_list = plugin._pending_context_tasks.get(session_id, [])
-    return next((task for task in task_list if task.get("job_id") == ctx_job_id), None)
+    return plugin._pending_context_tasks.get(session_id, EMPTY_MAPPING).get(ctx_job_id)
 
 
 def active_task_description(plugin: ProactiveChatPlugin, session_id: str) -> str:
-    session_info = plugin.session_data.get(session_id, {})
+    session_info = plugin.session_data.get(session_id)
     if not isinstance(session_info, dict):
         return ""
     for key in (
@@ -66,6 +67,16 @@ def active_task_description(plugin: ProactiveChatPlugin, session_id: str) -> str
     return ""
 
 
+@functools.lru_cache(maxsize=256)
+def _format_minute(minute: int, timezone: zoneinfo.ZoneInfo | None) -> str:
+    return datetime.fromtimestamp(minute * 60, tz=timezone).strftime(_TIME_FMT)
+
+
+def format_minute_time(timestamp: float, timezone: zoneinfo.ZoneInfo | None) -> str:
+    """格式化為「年月日 時:分」。輸出只到分鐘，故以分鐘為單位快取。"""
+    return _format_minute(int(timestamp // 60), timezone)
+
+
 def _coerce_timestamp(value) -> float | None:
     try:
         timestamp = float(value)
@@ -74,31 +85,36 @@ def _coerce_timestamp(value) -> float | None:
     return timestamp if 0 < timestamp <= time.time() + 60 else None
 
 
-def format_last_reply_time(timestamp: float, timezone: zoneinfo.ZoneInfo | None) -> str:
+def format_last_reply_time(
+    timestamp: float,
+    timezone: zoneinfo.ZoneInfo | None,
+    now: float | None = None,
+) -> str:
     if timestamp <= 0:
         return "未知"
-    elapsed_minutes = int(time.time() - timestamp) // 60
+    current = time.time() if now is None else now
+    elapsed_minutes = int(current - timestamp) // 60
     if elapsed_minutes < 60:
         elapsed = f"{elapsed_minutes}分鐘"
     else:
         hours, minutes = divmod(elapsed_minutes, 60)
         elapsed = f"{hours}小時{minutes}分鐘" if minutes else f"{hours}小時"
-    value = datetime.fromtimestamp(timestamp, tz=timezone)
-    return f"{value.strftime('%Y年%m月%d日 %H:%M')}（{elapsed}前）"
+    return f"{format_minute_time(timestamp, timezone)}（{elapsed}前）"
 
 
 def format_first_interaction_time(value, timezone: zoneinfo.ZoneInfo | None) -> str:
     timestamp = _coerce_timestamp(value)
     if timestamp is None:
         return "未知"
-    return datetime.fromtimestamp(timestamp, tz=timezone).strftime("%Y年%m月%d日 %H:%M")
+    return format_minute_time(timestamp, timezone)
 
 
-def format_elapsed_duration(value) -> str:
+def format_elapsed_duration(value, now: float | None = None) -> str:
     timestamp = _coerce_timestamp(value)
     if timestamp is None:
         return "未知"
-    minutes = max(0, int(time.time() - timestamp)) // 60
+    current = time.time() if now is None else now
+    minutes = max(0, int(current - timestamp)) // 60
     if minutes < 1:
         return "不到1分鐘"
     if minutes < 60:
@@ -118,17 +134,19 @@ def format_elapsed_duration(value) -> str:
 
 async def check_preconditions(
     plugin: ProactiveChatPlugin, session_id: str, *, skip_unanswered: bool = False
-) -> tuple[dict | None, int, bool]:
+) -> tuple[dict | None, int, bool, float]:
     session_config = get_session_config(plugin.config, session_id)
     if not await plugin._is_chat_allowed(session_id, session_config):
         await plugin._schedule_next_chat_and_save(session_id)
-        return None, 0, False
+        return None, 0, False, 0.0
 
     schedule_conf = session_config.get("schedule_settings", {})
     log_str = get_session_log_str(session_id, session_config, plugin.session_data)
+    # 未回覆次數與最後訊息時間在同一段鎖內一起讀取，後續組裝提示詞沿用這份快照
     async with plugin.data_lock:
-        state = plugin.session_data.get(session_id, {})
+        state = plugin.session_data.get(session_id, EMPTY_MAPPING)
         unanswered_count = state.get("unanswered_count", 0)
+        last_message_time = plugin.last_message_times.get(session_id, 0)
         if skip_unanswered:
             reached, reason = is_unanswered_limit_reached(
                 unanswered_count, schedule_conf, plugin.timezone
@@ -144,11 +162,11 @@ async def check_preconditions(
             await plugin._schedule_next_chat_and_save(session_id)
         elif "硬性上限" in reason:
             await plugin._clear_regular_job_state(session_id)
-            return None, 0, True
-        return None, 0, False
+            return None, 0, True, 0.0
+        return None, 0, False, 0.0
     if reason:
         logger.info(f"{_LOG_TAG} {log_str} {reason}")
-    return session_config, unanswered_count, False
+    return session_config, unanswered_count, False, last_message_time
 
 
 async def clear_regular_job_state_if_current(
@@ -174,10 +192,44 @@ async def update_unanswered_and_reschedule(
     ctx_job_id: str = "",
     clear_task_description: bool = False,
     next_check_minutes: int | None = None,
+    now: float | None = None,
     gate: DispatchGate,
 ) -> bool:
     habit_task = plugin._find_habit_task(session_id, ctx_job_id)
     count_unanswered = not habit_task or bool(habit_task.get("count_unanswered", False))
+    next_count = unanswered_count + int(count_unanswered)
+
+    # 下一次排程只取決於配置與計數，先在鎖外算好，縮短 data_lock 臨界區
+    run_date: datetime | None = None
+    limit_reason = ""
+    if not (habit_task and not count_unanswered) and not (
+        is_group_session_id(session_id)
+        and not resolve_auto_check_settings(session_config).enable
+    ):
+        schedule_conf = session_config.get("schedule_settings", {})
+        if now is None:
+            now = time.time()
+        # 上限判斷與間隔計算共用同一個時間點比對時段規則
+        now_dt = datetime.fromtimestamp(now, tz=plugin.timezone)
+        reached, limit_reason = is_unanswered_limit_reached(
+            next_count, schedule_conf, plugin.timezone, now=now_dt
+        )
+        if not reached:
+            if next_check_minutes is not None:
+                auto_settings = resolve_auto_check_settings(session_config)
+                interval = clamp_auto_check_interval(
+                    int(next_check_minutes) * 60, auto_settings
+                )
+            else:
+                interval = compute_session_interval(
+                    schedule_conf,
+                    session_config,
+                    plugin.timezone,
+                    next_count,
+                    now=now_dt,
+                )
+            run_date = datetime.fromtimestamp(now + interval, tz=plugin.timezone)
+
     async with plugin.data_lock:
         match plugin._gate_verdict(gate):
             case GateVerdict.CURRENT | GateVerdict.QUIET_HOURS:
@@ -187,7 +239,6 @@ async def update_unanswered_and_reschedule(
             case unreachable:
                 assert_never(unreachable)
         state = plugin.session_data.setdefault(session_id, {})
-        next_count = unanswered_count + int(count_unanswered)
         state["unanswered_count"] = next_count
         heat_settings = resolve_heat_settings(session_config)
         if heat_settings.enable:
@@ -204,58 +255,34 @@ async def update_unanswered_and_reschedule(
         if habit_task and not count_unanswered:
             await plugin._save_data()
             return True
-        if (
-            is_group_session_id(session_id)
-            and not resolve_auto_check_settings(session_config).enable
-        ):
+        if run_date is None:
             state.pop("next_trigger_time", None)
-            await plugin._save_data()
-            return True
-        schedule_conf = session_config.get("schedule_settings", {})
-        reached, reason = is_unanswered_limit_reached(
-            next_count, schedule_conf, plugin.timezone
-        )
-        if reached:
-            state.pop("next_trigger_time", None)
-            await plugin._save_data()
-            logger.info(f"{_LOG_TAG} {reason}，不再安排下一次主動訊息。")
-            return True
-        if next_check_minutes is not None:
-            auto_settings = resolve_auto_check_settings(session_config)
-            interval = clamp_auto_check_interval(
-                int(next_check_minutes) * 60, auto_settings
-            )
         else:
-            interval = compute_session_interval(
-                schedule_conf,
-                session_config,
-                plugin.timezone,
-                next_count,
-            )
-        run_date = datetime.fromtimestamp(time.time() + interval, tz=plugin.timezone)
-        state["next_trigger_time"] = run_date.timestamp()
+            state["next_trigger_time"] = run_date.timestamp()
         await plugin._save_data()
-        plugin._add_scheduled_job_at(session_id, run_date)
+    if run_date is None:
+        if limit_reason:
+            logger.info(f"{_LOG_TAG} {limit_reason}，不再安排下一次主動訊息。")
         return True
+    plugin._add_scheduled_job_at(session_id, run_date)
+    return True
 
 
 async def cleanup_context_task(
     plugin: ProactiveChatPlugin, session_id: str, ctx_job_id: str
 ) -> None:
-    if session_id not in plugin._pending_context_tasks:
+    tasks = plugin._pending_context_tasks.get(session_id)
+    if not tasks or tasks.pop(ctx_job_id, None) is None:
+        # 任務已被取消或清理，沒有狀態變化就不再寫盤
         return
-    tasks = plugin._pending_context_tasks[session_id]
-    plugin._pending_context_tasks[session_id] = [
-        task for task in tasks if task.get("job_id") != ctx_job_id
-    ]
-    if not plugin._pending_context_tasks[session_id]:
+    if not tasks:
         plugin._pending_context_tasks.pop(session_id, None)
+    # 來源任務清理固定是發送流程最後一步（在歷史寫回之後），不併入狀態收尾的臨界區
     async with plugin.data_lock:
         state = plugin.session_data.get(session_id)
         if state:
-            remaining = plugin._pending_context_tasks.get(session_id)
-            if remaining:
-                state["pending_context_tasks"] = remaining
+            if tasks:
+                state["pending_context_tasks"] = list(tasks.values())
             else:
                 state.pop("pending_context_tasks", None)
                 state.pop("pending_context_task", None)
@@ -273,9 +300,9 @@ async def handle_fatal_error(
         f"{_LOG_TAG} check_and_chat 致命錯誤 | session={session_id}: "
         f"{type(error).__name__}: {error}"
     )
-    logger.debug(traceback.format_exc())
-    error_text = f"{type(error).__name__} {error}".lower()
-    if skip_reschedule or any(word in error_text for word in _AUTH_ERROR_KEYWORDS):
+    # 交給 logger 延遲格式化，未啟用 debug 時不走訪堆疊
+    logger.debug(f"{_LOG_TAG} check_and_chat 致命錯誤堆疊", exc_info=error)
+    if skip_reschedule or _RE_AUTH_ERROR.search(f"{type(error).__name__} {error}"):
         return
     try:
         async with plugin.data_lock:
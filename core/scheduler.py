@@ -3,6 +3,8 @@
 
 from __future__ import annotations
 
+import functools
+import logging
 import random
 import zoneinfo
 from datetime import date, datetime, timedelta, tzinfo
@@ -187,6 +189,8 @@ def compute_weighted_interval(
     schedule_conf: dict,
     timezone: zoneinfo.ZoneInfo | None = None,
     unanswered_count: int = 0,
+    *,
+    now: datetime | None = None,
 ) -> int:
     """
     根據 ``schedule_settings`` 計算下一次觸發間隔（秒）。
@@ -199,37 +203,27 @@ def compute_weighted_interval(
         schedule_conf: 排程配置字典
         timezone: 時區資訊
         unanswered_count: 當前未回覆次數（從 0 開始）
+        now: 判斷時段用的當前時間；同一次排程決策可共用，省略時取現在時間
 
     回傳: 下一次觸發間隔（秒）
     """
-    now = datetime.now(timezone) if timezone else datetime.now()
-    current_hour = now.hour
-    current_minute = now.minute
-
-    for rule in schedule_conf.get("schedule_rules", ()):
-        if not isinstance(rule, dict):
-            continue
-        start_h = rule.get("start_hour", 0)
-        start_m = rule.get("start_minute", 0)
-        end_h = rule.get("end_hour", 24)
-        end_m = rule.get("end_minute", 0)
-
-        if not _time_in_range(
-            current_hour, current_minute, start_h, start_m, end_h, end_m
-        ):
-            continue
-
-        weights_str = (rule.get("interval_weights") or "").strip()
-        if not weights_str:
-            break  # 規則匹配但 weights 為空 → 回退全域
+    rule = _match_schedule_rule(schedule_conf, timezone, now=now)
+    weights_str = (rule.get("interval_weights") or "").strip() if rule else ""
+    # 規則匹配但 weights 為空或解析失敗 → 回退全域
+    if weights_str:
         interval = _pick_from_weights(weights_str, unanswered_count)
         if interval is not None:
-            logger.debug(
-                f"{_LOG_TAG} 命中時段規則 {start_h:02d}:{start_m:02d}-{end_h:02d}:{end_m:02d}，"
-                f"加權隨機間隔: {interval // 60} 分鐘（未回覆次數: {unanswered_count + 1}）。"
-            )
+            # 未啟用 DEBUG 日誌時不必讀取規則欄位與組裝訊息
+            if logger.isEnabledFor(logging.DEBUG):
+                start_h = rule.get("start_hour", 0)
+                start_m = rule.get("start_minute", 0)
+                end_h = rule.get("end_hour", 24)
+                end_m = rule.get("end_minute", 0)
+                logger.debug(
+                    f"{_LOG_TAG} 命中時段規則 {start_h:02d}:{start_m:02d}-{end_h:02d}:{end_m:02d}，"
+                    f"加權隨機間隔: {interval // 60} 分鐘（未回覆次數: {unanswered_count + 1}）。"
+                )
             return interval
-        break  # 解析失敗 → 回退全域
 
     # 回退到全域 min/max
     min_s = int(schedule_conf.get("min_interval_minutes", 30)) * 60
@@ -241,6 +235,8 @@ def should_trigger_by_unanswered(
     unanswered_count: int,
     schedule_conf: dict,
     timezone: zoneinfo.ZoneInfo | None = None,
+    *,
+    now: datetime | None = None,
 ) -> tuple[bool, str]:
     """
     根據未回覆次數與衰減率，判斷是否應觸發主動訊息。
@@ -271,7 +267,9 @@ def should_trigger_by_unanswered(
         return True, ""
 
     # 嘗試從當前時段的排程規則取得逐次概率列表和時段專屬上限
-    prob_list, matched_rule = _resolve_decay_list_and_rule(schedule_conf, timezone)
+    prob_list, matched_rule = _resolve_decay_list_and_rule(
+        schedule_conf, timezone, now=now
+    )
     idx = unanswered_count - 1  # 第 1 次未回覆 → index 0
     max_unanswered = _resolve_max_unanswered(schedule_conf, matched_rule)
 
@@ -296,16 +294,15 @@ def should_trigger_by_unanswered(
             if default_step <= 0.0:
                 # step=0 → 不衰減，維持列表末尾概率
                 return _roll_probability(last_prob, unanswered_count, "全域預設衰減")
-            extra = _continue_decay_from(
+            probability = _continue_decay_from(
                 last_prob, default_step, idx - len(prob_list) + 1
             )
-            return _roll_probability(extra[-1], unanswered_count, "全域預設衰減")
+            return _roll_probability(probability, unanswered_count, "全域預設衰減")
 
     # 未匹配到任何規則的 decay_rate → 用 default_decay_rate 從 1.0 開始遞減
     if default_step is not None:
-        generated = _generate_step_decay_list(default_step, idx + 1)
-        if idx < len(generated):
-            return _roll_probability(generated[idx], unanswered_count, "全域預設衰減")
+        probability = _continue_decay_from(1.0, default_step, idx)
+        return _roll_probability(probability, unanswered_count, "全域預設衰減")
 
     # 未配置衰減時，依照配置說明視為不衰減。
     if (schedule_conf.get("default_decay_rate") or "").strip() == "":
@@ -315,7 +312,10 @@ def should_trigger_by_unanswered(
 
 
 def get_time_slot_reset_count(
-    schedule_conf: dict, timezone: zoneinfo.ZoneInfo | None = None
+    schedule_conf: dict,
+    timezone: zoneinfo.ZoneInfo | None = None,
+    *,
+    now: datetime | None = None,
 ) -> int | None:
     """
     取得當前時段的未回覆計數重置值。
@@ -328,7 +328,7 @@ def get_time_slot_reset_count(
     Returns:
         重置後的計數值，None 表示不重置（繼承上一時段）
     """
-    _, matched_rule = _resolve_decay_list_and_rule(schedule_conf, timezone)
+    _, matched_rule = _resolve_decay_list_and_rule(schedule_conf, timezone, now=now)
     if not matched_rule:
         return None
 
@@ -341,10 +341,13 @@ def get_time_slot_reset_count(
 
 
 def get_current_time_slot_id(
-    schedule_conf: dict, timezone: zoneinfo.ZoneInfo | None = None
+    schedule_conf: dict,
+    timezone: zoneinfo.ZoneInfo | None = None,
+    *,
+    now: datetime | None = None,
 ) -> str:
     """回傳目前命中的時段識別碼，供跨時段重置計數使用。"""
-    _, matched_rule = _resolve_decay_list_and_rule(schedule_conf, timezone)
+    _, matched_rule = _resolve_decay_list_and_rule(schedule_conf, timezone, now=now)
     if not matched_rule:
         return "__default__"
     return ":".join(
@@ -362,11 +365,13 @@ def is_unanswered_limit_reached(
     unanswered_count: int,
     schedule_conf: dict,
     timezone: zoneinfo.ZoneInfo | None = None,
+    *,
+    now: datetime | None = None,
 ) -> tuple[bool, str]:
     """不擲骰，只檢查目前未回覆次數是否已達硬性上限。"""
     if unanswered_count <= 0:
         return False, ""
-    _, matched_rule = _resolve_decay_list_and_rule(schedule_conf, timezone)
+    _, matched_rule = _resolve_decay_list_and_rule(schedule_conf, timezone, now=now)
     max_unanswered = _resolve_max_unanswered(schedule_conf, matched_rule)
     if max_unanswered > 0 and unanswered_count >= max_unanswered:
         return True, (
@@ -424,7 +429,10 @@ def _resolve_decay_list(
 
 
 def _resolve_decay_list_and_rule(
-    schedule_conf: dict, timezone: zoneinfo.ZoneInfo | None = None
+    schedule_conf: dict,
+    timezone: zoneinfo.ZoneInfo | None = None,
+    *,
+    now: datetime | None = None,
 ) -> tuple[list[float] | None, dict | None]:
     """
     解析當前生效的逐次衰減概率列表，並回傳匹配的規則。
@@ -436,30 +444,41 @@ def _resolve_decay_list_and_rule(
     Returns:
         (decay_list, matched_rule)
     """
-    now = datetime.now(timezone) if timezone else datetime.now()
-    current_hour = now.hour
-    current_minute = now.minute
+    rule = _match_schedule_rule(schedule_conf, timezone, now=now)
+    if rule is None:
+        return None, None
+    raw = (rule.get("decay_rate") or "").strip()
+    # 規則匹配但未設定 decay_rate → 回傳 None, rule
+    return (_parse_decay_list(raw) if raw else None), rule
+
+
+def _match_schedule_rule(
+    schedule_conf: dict,
+    timezone: zoneinfo.ZoneInfo | None = None,
+    *,
+    now: datetime | None = None,
+) -> dict | None:
+    """回傳當前時間命中的第一條 ``schedule_rules`` 規則，未命中回傳 None。
+
+    間隔計算與衰減判斷共用此匹配，命中即停止掃描。
+    """
+    current = now or (datetime.now(timezone) if timezone else datetime.now())
+    current_hour = current.hour
+    current_minute = current.minute
 
     for rule in schedule_conf.get("schedule_rules", ()):
         if not isinstance(rule, dict):
             continue
-        start_h = rule.get("start_hour", 0)
-        start_m = rule.get("start_minute", 0)
-        end_h = rule.get("end_hour", 24)
-        end_m = rule.get("end_minute", 0)
-
-        if not _time_in_range(
-            current_hour, current_minute, start_h, start_m, end_h, end_m
+        if _time_in_range(
+            current_hour,
+            current_minute,
+            rule.get("start_hour", 0),
+            rule.get("start_minute", 0),
+            rule.get("end_hour", 24),
+            rule.get("end_minute", 0),
         ):
-            continue
-
-        raw = (rule.get("decay_rate") or "").strip()
-        if raw:
-            return _parse_decay_list(raw), rule
-        # 規則匹配但未設定 decay_rate → 回傳 None, rule
-        return None, rule
-
-    return None, None
+            return rule
+    return None
 
 
 def _parse_decay_list(raw: str) -> list[float] | None:
@@ -496,41 +515,15 @@ def _parse_single_decay(raw: str) -> float | None:
         return None
 
 
-def _continue_decay_from(
-    last_prob: float, step: float, extra_count: int
-) -> list[float]:
-    """
-    從 *last_prob* 開始，以 *step* 為遞減步長，生成 *extra_count* 個後續概率。
-
-    用於 decay_rate 列表用盡後，以 default_decay_rate 步長接續遞減。
-    概率下限為 0.0。
-    """
-    result: list[float] = []
-    prob = last_prob
-    for _ in range(extra_count):
-        prob -= step
-        result.append(max(0.0, round(prob, 10)))
-    return result
-
-
-def _generate_step_decay_list(step: float, min_length: int) -> list[float]:
+def _continue_decay_from(last_prob: float, step: float, extra_count: int) -> float:
     """
-    根據遞減步長從 1.0 開始生成衰減概率列表。
+    從 *last_prob* 開始，以 *step* 為遞減步長遞減 *extra_count* 次後的概率。
 
-    例如 step=0.05 → [1.0, 0.95, 0.9, 0.85, ...]，直到概率 ≤ 0。
-    至少生成 *min_length* 個元素（不足時以 0.0 補齊）。
-    step=0 時視為不衰減，回傳全 1.0 列表。
+    用於 decay_rate 列表用盡後接續遞減，以及未配置列表時從 1.0 開始遞減。
+    遞減為線性，直接以乘法計算，不必逐次生成概率表；極小步長也是常數時間。
+    step=0 時視為不衰減。概率下限為 0.0。
     """
-    if step <= 0.0:
-        return [1.0] * max(min_length, 1)
-    result: list[float] = []
-    prob = 1.0
-    while prob > 0.0:
-        result.append(round(prob, 10))
-        prob -= step
-    while len(result) < min_length:
-        result.append(0.0)
-    return result
+    return max(0.0, round(last_prob - step * extra_count, 10))
 
 
 def _time_in_range(
@@ -592,54 +585,64 @@ def _pick_from_weights(weights_str: str, unanswered_count: int = 0) -> int | Non
     回傳: 隨機選取的間隔秒數，解析失敗時回傳 None
     """
     try:
-        buckets: list[tuple[float, float, float]] = []
-        for part in weights_str.split(","):
-            part = part.strip()
-            if not part:
-                continue
-
-            # 檢查是否有觸發條件（@符號）
-            if "@" in part:
-                weight_part, condition_part = part.split("@", 1)
-                # 檢查當前未回覆次數是否符合條件
-                if not _match_trigger_condition(
-                    unanswered_count, condition_part.strip()
-                ):
-                    continue  # 不符合條件，跳過此權重配置
-            else:
-                weight_part = part
-
-            range_str, w_str = weight_part.split(":")
-            lo_s, hi_s = range_str.split("-")
-
-            # 解析數值和單位
-            lo, lo_unit = _parse_time_value(lo_s.strip())
-            hi, hi_unit = _parse_time_value(hi_s.strip())
-            w = float(w_str)
-
-            # 統一轉換為秒
-            lo_seconds = _to_seconds(lo, lo_unit)
-            hi_seconds = _to_seconds(hi, hi_unit)
-
-            if w > 0 and hi_seconds > lo_seconds:
-                buckets.append((lo_seconds, hi_seconds, w))
-
-        if not buckets:
-            return None
-
-        total = sum(w for _, _, w in buckets)
-        r = random.uniform(0, total)
-        acc = 0.0
-        for lo, hi, w in buckets:
-            acc += w
-            if r <= acc:
-                return int(random.uniform(lo, hi))
-        # 兜底
-        lo, hi, _ = buckets[-1]
-        return int(random.uniform(lo, hi))
+        parsed = _parse_weight_buckets(weights_str, unanswered_count)
     except Exception as e:
         logger.warning(f"{_LOG_TAG} 解析 interval_weights 失敗: {e}，回退全域間隔。")
         return None
+    if parsed is None:
+        return None
+
+    cum_weights, ranges = parsed
+    lo, hi = random.choices(ranges, cum_weights=cum_weights)[0]
+    return int(random.uniform(lo, hi))
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_weight_buckets(
+    weights_str: str, unanswered_count: int
+) -> tuple[tuple[float, ...], tuple[tuple[float, float], ...]] | None:
+    """解析並篩選 ``interval_weights``，回傳（累積權重, 秒數區間）。
+
+    結果只取決於配置字串與未回覆次數，以 LRU 快取避免每次排程重複解析；
+    解析錯誤會直接拋出（不進快取），由呼叫端記錄並回退。
+    """
+    cum_weights: list[float] = []
+    ranges: list[tuple[float, float]] = []
+    acc = 0.0
+    for part in weights_str.split(","):
+        part = part.strip()
+        if not part:
+            continue
+
+        # 檢查是否有觸發條件（@符號）
+        if "@" in part:
+            weight_part, condition_part = part.split("@", 1)
+            # 檢查當前未回覆次數是否符合條件
+            if not _match_trigger_condition(unanswered_count, condition_part.strip()):
+                continue  # 不符合條件，跳過此權重配置
+        else:
+            weight_part = part
+
+        range_str, w_str = weight_part.split(":")
+        lo_s, hi_s = range_str.split("-")
+
+        # 解析數值和單位
+        lo, lo_unit = _parse_time_value(lo_s.strip())
+        hi, hi_unit = _parse_time_value(hi_s.strip())
+        w = float(w_str)
+
+        # 統一轉換為秒
+        lo_seconds = _to_seconds(lo, lo_unit)
+        hi_seconds = _to_seconds(hi, hi_unit)
+
+        if w > 0 and hi_seconds > lo_seconds:
+            acc += w
+            cum_weights.append(acc)
+            ranges.append((lo_seconds, hi_seconds))
+
+    if not ranges:
+        return None
+    return tuple(cum_weights), tuple(ranges)
 
 
 def _parse_time_value(value_str: str) -> tuple[float, str]:
@@ -30,6 +30,8 @@ class ProactiveStateStore:
         self.db_path = Path(db_path)
         self.connection: aiosqlite.Connection | None = None
         self._write_lock = asyncio.Lock()
+        # 最近一次已落盤的快照；內容未變時略過寫入與 commit
+        self._last_payload: str | None = None
 
     async def initialize(self) -> None:
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -52,6 +54,7 @@ class ProactiveStateStore:
         if self.connection is not None:
             await self.connection.close()
             self.connection = None
+        self._last_payload = None
 
     async def load_session_data(self) -> dict[str, dict] | None:
         if self.connection is None:
@@ -66,6 +69,7 @@ class ProactiveStateStore:
             return None
 
         payload = row["value"]
+        self._last_payload = payload
         if not payload.strip():
             return {}
         try:
@@ -89,6 +93,8 @@ class ProactiveStateStore:
             raise RuntimeError("proactive_state.db 尚未初始化，無法保存狀態")
         payload = json.dumps(session_data, ensure_ascii=False, separators=(",", ":"))
         async with self._write_lock:
+            if payload == self._last_payload:
+                return
             await self.connection.execute(
                 """
                 INSERT INTO plugin_state (key, value, updated_at)
@@ -100,3 +106,4 @@ class ProactiveStateStore:
                 (_STATE_KEY_SESSION_DATA, payload, time.time()),
             )
             await self.connection.commit()
+            self._last_payload = payload
@@ -3,11 +3,14 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import re
+import unicodedata
 import zoneinfo
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Iterator
 from datetime import datetime
+from types import MappingProxyType
 from typing import TYPE_CHECKING, Any, TypeVar
 
 if TYPE_CHECKING:
@@ -27,10 +30,14 @@ MSG_TYPE_GROUP = "GroupMessage"
 MSG_TYPE_KEYWORD_FRIEND = "Friend"
 MSG_TYPE_KEYWORD_GROUP = "Group"
 
+# 唯讀空映射：僅讀取的 ``.get(key, EMPTY_MAPPING)`` 回退不必每次配置新 dict
+EMPTY_MAPPING: MappingProxyType[str, Any] = MappingProxyType({})
+
+# SQLite 鎖定錯誤訊息關鍵字（小寫比對）
+_SQLITE_LOCK_KEYWORDS = frozenset({"database is locked", "database table is locked"})
+
 # JSON 解析用預編譯正則
 _RE_MD_CODE_BLOCK = re.compile(r"```(?:json)?\s*")
-_RE_JSON_OBJECT = re.compile(r"\{[^{}]*\}", re.DOTALL)
-_RE_JSON_ARRAY = re.compile(r"\[[^\[\]]*\]", re.DOTALL)
 
 
 # ── 時間工具 ──────────────────────────────────────────────
@@ -52,6 +59,37 @@ def is_quiet_time(quiet_hours_str: str, tz: zoneinfo.ZoneInfo | None) -> bool:
 # ── JSON 解析 ─────────────────────────────────────────────
 
 
+def _iter_balanced_json(text: str, opener: str) -> Iterator[str]:
+    """依序產生以 *opener* 開頭且括號平衡的片段。
+
+    單次前向掃描，追蹤巢狀深度並略過字串（含跳脫字元）內的括號，
+    可正確取出巢狀物件／陣列。
+    """
+    start = text.find(opener)
+    while start != -1:
+        depth = 0
+        in_str = escape = False
+        for i in range(start, len(text)):
+            ch = text[i]
+            if in_str:
+                if escape:
+                    escape = False
+                elif ch == "\\":
+                    escape = True
+                elif ch == '"':
+                    in_str = False
+            elif ch == '"':
+                in_str = True
+            elif ch in "{[":
+                depth += 1
+            elif ch in "}]":
+                depth -= 1
+                if depth == 0:
+                    yield text[start : i + 1]
+                    break
+        start = text.find(opener, start + 1)
+
+
 def parse_llm_json(
     text: str,
     *,
@@ -60,15 +98,18 @@ def parse_llm_json(
 ) -> dict | list | None:
     """從 LLM 回應文字中穩健地解析 JSON。
 
-    處理 markdown 程式碼區塊、fallback 正則搜尋。
+    處理 markdown 程式碼區塊，並以括號平衡掃描從前後綴文字中取出 JSON 片段。
     *expect_type* 為 ``dict`` 時只接受物件，為 ``list`` 時只接受陣列，
     為 ``None`` 時接受任意 JSON 值。
     """
     if not text:
         return None
 
-    # 移除 markdown 程式碼區塊標記
-    cleaned = _RE_MD_CODE_BLOCK.sub("", text).strip().rstrip("`")
+    # 移除 markdown 程式碼區塊標記；沒有反引號時（最常見的乾淨 JSON）免跑正則
+    if "`" in text:
+        cleaned = _RE_MD_CODE_BLOCK.sub("", text).strip().rstrip("`")
+    else:
+        cleaned = text.strip()
 
     # 嘗試直接解析完整文字
     try:
@@ -80,29 +121,59 @@ def parse_llm_json(
     except (json.JSONDecodeError, TypeError):
         pass
 
-    # Fallback：以正則搜尋文字中的 JSON 片段
-    patterns: list[re.Pattern[str]] = []
+    # Fallback：掃描文字中括號平衡的 JSON 片段
+    openers: list[str] = []
     if expect_type is dict or expect_type is None:
-        patterns.append(_RE_JSON_OBJECT)
+        openers.append("{")
     if expect_type is list or expect_type is None:
-        patterns.append(_RE_JSON_ARRAY)
+        openers.append("[")
 
-    for pat in patterns:
-        match = pat.search(cleaned)
-        if match:
+    for opener in openers:
+        for fragment in _iter_balanced_json(cleaned, opener):
             try:
-                result = json.loads(match.group())
-                if expect_type is not None and not isinstance(result, expect_type):
-                    continue
-                return result
+                result = json.loads(fragment)
             except (json.JSONDecodeError, TypeError):
-                pass
+                continue
+            if expect_type is not None and not isinstance(result, expect_type):
+                continue
+            return result
 
     label = "JSON 陣列" if expect_type is list else "JSON"
     logger.warning(f"{log_tag} 無法解析 LLM 的 {label} 回應: {text[:200]}")
     return None
 
 
+# ── 訊息文字判斷 ──────────────────────────────────────────
+
+
+def is_contentless_message(text: str) -> bool:
+    """訊息只有標點與空白（如「。。。」「？？」「!!」）時，沒有可分析的語境。
+
+    表情符號屬於 So 類別，可能帶有意義（如 😴），不視為無內容。
+    """
+    return all(ch.isspace() or unicodedata.category(ch)[0] in "PZ" for ch in text)
+
+
+# ── 例外判斷 ──────────────────────────────────────────────
+
+
+def is_sqlite_lock_error(error: BaseException) -> bool:
+    """沿例外鏈檢查 SQLite 鎖定訊息，不必格式化整份 traceback。
+
+    Core 常把 sqlite3 / SQLAlchemy 的鎖定錯誤包成其他例外再拋出，
+    故同時檢查 ``__cause__`` 與 ``__context__``。
+    """
+    seen: set[int] = set()
+    current: BaseException | None = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        message = str(current).lower()
+        if any(word in message for word in _SQLITE_LOCK_KEYWORDS):
+            return True
+        current = current.__cause__ or current.__context__
+    return False
+
+
 # ── UMO 容錯包裝器 ────────────────────────────────────────
 
 _T = TypeVar("_T")
@@ -147,12 +218,15 @@ async def async_with_umo_fallback(
 # ── UMO 解析 ─────────────────────────────────────────────
 
 
+@functools.lru_cache(maxsize=1024)
 def parse_session_id(session_id: str) -> tuple[str, str, str] | None:
     """
     解析 AstrBot unified_msg_origin 格式。
 
     標準: ``平台ID:訊息類型:目標ID``
     簡寫: ``平台ID:目標ID`` → 預設 FriendMessage
+
+    純字串運算且回傳不可變 tuple，以 LRU 快取重複出現的會話 ID。
     """
     if not session_id:
         return None
@@ -8,6 +8,7 @@ from datetime import datetime
 
 import aiofiles
 import aiofiles.os as aio_os
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 import astrbot.api.star as star
@@ -154,9 +155,10 @@ class ProactiveChatPlugin(star.Star):
         self.first_message_logged: set[str] = set()
         # 清理計數器：每處理 10 次 after_message_sent 就清理過期的 session_temp_state
         self._cleanup_counter: int = 0
-        # 語境預測的待執行任務追蹤: { session_id: [ { job_id, reason, hint, ... }, ... ] }
-        # 每個會話可同時存在多個語境任務（如短期跟進 + 長期早安問候）
-        self._pending_context_tasks: dict[str, list[dict]] = {}
+        # 語境預測的待執行任務追蹤: { session_id: { job_id: { reason, hint, ... } } }
+        # 每個會話可同時存在多個語境任務（如短期跟進 + 長期早安問候）；
+        # 以 job_id 為鍵，查找與移除皆為 O(1)，落盤時再轉回列表
+        self._pending_context_tasks: dict[str, dict[str, dict]] = {}
         # 習慣時段任務追蹤: { session_id: [ { job_id, reason, prompt, ... }, ... ] }
         self._pending_habit_tasks: dict[str, list[dict]] = {}
         # 語境分析背景任務：同一會話只保留最新一次，避免連續訊息時並發讀取 Core history。
@@ -323,8 +325,10 @@ class ProactiveChatPlugin(star.Star):
         self._delivery_coordinators.merge_aliases(old_session_id, new_session_id)
 
         try:
-            if self.scheduler and self.scheduler.get_job(old_session_id):
+            if self.scheduler:
                 self.scheduler.remove_job(old_session_id)
+        except JobLookupError:
+            pass
         except Exception as e:
             logger.debug(
                 f"{_LOG_TAG} 移除舊平台排程失敗 | session={old_session_id}: {e}"
@@ -407,20 +411,11 @@ class ProactiveChatPlugin(star.Star):
                 self.last_message_times.get(new_session_id, 0), old_last
             )
 
-        old_tasks = self._pending_context_tasks.pop(old_session_id, [])
+        old_tasks = self._pending_context_tasks.pop(old_session_id, {})
         if old_tasks:
-            merged_tasks = self._pending_context_tasks.setdefault(new_session_id, [])
-            seen_jobs = {
-                task.get("job_id") for task in merged_tasks if isinstance(task, dict)
-            }
-            for task in old_tasks:
-                if not isinstance(task, dict):
-                    continue
-                job_id = task.get("job_id")
-                if job_id in seen_jobs:
-                    continue
-                merged_tasks.append(task)
-                seen_jobs.add(job_id)
+            merged_tasks = self._pending_context_tasks.setdefault(new_session_id, {})
+            for job_id, task in old_tasks.items():
+                merged_tasks.setdefault(job_id, task)
 
         old_habit_tasks = self._pending_habit_tasks.pop(old_session_id, [])
         if old_habit_tasks:
@@ -844,8 +839,10 @@ class ProactiveChatPlugin(star.Star):
 
         if not is_group_session_id(session_id):
             try:
-                if self.scheduler and self.scheduler.get_job(session_id):
+                if self.scheduler:
                     self.scheduler.remove_job(session_id)
+            except JobLookupError:
+                pass
             except Exception as e:
                 logger.debug(
                     f"{_LOG_TAG} 移除私聊一般排程失敗 | session={session_id}: {e}"
@@ -1065,8 +1062,13 @@ class ProactiveChatPlugin(star.Star):
                 return
 
             schedule_conf = cfg.get("schedule_settings", {})
-            interval = compute_session_interval(schedule_conf, cfg, self.timezone, 0)
-            run_date = datetime.fromtimestamp(time.time() + interval, tz=self.timezone)
+            now = datetime.now(self.timezone)
+            interval = compute_session_interval(
+                schedule_conf, cfg, self.timezone, 0, now=now
+            )
+            run_date = datetime.fromtimestamp(
+                now.timestamp() + interval, tz=self.timezone
+            )
             await self._persist_regular_job(
                 session_id,
                 run_date.timestamp(),
@@ -1094,28 +1096,29 @@ class ProactiveChatPlugin(star.Star):
         job_id = ctx_job_id or session_id
         async with self.data_lock:
             if ctx_job_id:
-                pending_tasks = (
-                    self._pending_habit_tasks.get(session_id, [])
-                    if ctx_job_id.startswith(_HABIT_TASK_PREFIX)
-                    else self._pending_context_tasks.get(session_id, [])
-                )
                 found = False
-                for task in pending_tasks:
-                    if (
-                        isinstance(task, dict)
-                        and str(task.get("job_id", "")) == ctx_job_id
-                    ):
+                if ctx_job_id.startswith(_HABIT_TASK_PREFIX):
+                    pending_tasks = self._pending_habit_tasks.get(session_id, [])
+                    for task in pending_tasks:
+                        if (
+                            isinstance(task, dict)
+                            and str(task.get("job_id", "")) == ctx_job_id
+                        ):
+                            task["run_at"] = run_date.isoformat()
+                            self.session_data.setdefault(session_id, {})[
+                                "pending_habit_tasks"
+                            ] = pending_tasks
+                            found = True
+                            break
+                else:
+                    ctx_tasks = self._pending_context_tasks.get(session_id, {})
+                    task = ctx_tasks.get(ctx_job_id)
+                    if task is not None:
                         task["run_at"] = run_date.isoformat()
-                        key = (
-                            "pending_habit_tasks"
-                            if ctx_job_id.startswith(_HABIT_TASK_PREFIX)
-                            else "pending_context_tasks"
-                        )
-                        self.session_data.setdefault(session_id, {})[key] = (
-                            pending_tasks
-                        )
+                        self.session_data.setdefault(session_id, {})[
+                            "pending_context_tasks"
+                        ] = list(ctx_tasks.values())
                         found = True
-                        break
                 if not found:
                     logger.warning(
                         f"{_LOG_TAG} 找不到特殊任務 {ctx_job_id}，略過重試排程。"
@@ -1157,7 +1160,11 @@ class ProactiveChatPlugin(star.Star):
 
         async with self.data_lock:
             sd = self.session_data.setdefault(session_id, {})
-            current_slot_id = get_current_time_slot_id(schedule_conf, self.timezone)
+            # 同一次排程決策的時段判斷共用同一個時間點
+            now = datetime.now(self.timezone)
+            current_slot_id = get_current_time_slot_id(
+                schedule_conf, self.timezone, now=now
+            )
 
             if reset_counter:
                 sd["unanswered_count"] = 0
@@ -1165,7 +1172,9 @@ class ProactiveChatPlugin(star.Star):
             else:
                 # 檢查當前時段是否需要重置未回覆計數
                 previous_slot_id = sd.get("last_schedule_slot_id")
-                reset_count = get_time_slot_reset_count(schedule_conf, self.timezone)
+                reset_count = get_time_slot_reset_count(
+                    schedule_conf, self.timezone, now=now
+                )
                 if reset_count is not None and previous_slot_id != current_slot_id:
                     old_count = sd.get("unanswered_count", 0)
                     sd["unanswered_count"] = reset_count
@@ -1180,6 +1189,7 @@ class ProactiveChatPlugin(star.Star):
                     int(sd.get("unanswered_count", 0) or 0),
                     schedule_conf,
                     self.timezone,
+                    now=now,
                 )
                 if limit_reached:
                     sd.pop("next_trigger_time", None)
@@ -1203,8 +1213,12 @@ class ProactiveChatPlugin(star.Star):
                     session_config,
                     self.timezone,
                     int(unanswered_count or 0),
+                    now=now,
                 )
-            run_date = datetime.fromtimestamp(time.time() + interval, tz=self.timezone)
+            # 與時段判斷共用同一個 now，排程時間與規則匹配依據同一時刻
+            run_date = datetime.fromtimestamp(
+                now.timestamp() + interval, tz=self.timezone
+            )
             # 持久化下次觸發時間（供重啟後恢復）
             sd["next_trigger_time"] = run_date.timestamp()
             for key in clear_timer_keys:
@@ -1946,8 +1960,10 @@ class ProactiveChatPlugin(star.Star):
                     await self._reset_group_silence_timer(session_id)
                     await self._clear_regular_job_state(session_id)
                     try:
-                        if self.scheduler and self.scheduler.get_job(session_id):
+                        if self.scheduler:
                             self.scheduler.remove_job(session_id)
+                    except JobLookupError:
+                        pass
                     except Exception as e:
                         logger.debug(
                             f"{_LOG_TAG} _handle_message 移除舊排程任務失敗"
@@ -2119,7 +2135,7 @@ class ProactiveChatPlugin(star.Star):
             for sid, tasks in self._pending_context_tasks.items():
                 session_config = get_session_config(self.config, sid)
                 log_str = get_session_log_str(sid, session_config, self.session_data)
-                for t in tasks:
+                for t in tasks.values():
                     run_at = t.get("run_at", "")
                     reason = t.get("reason", "")
                     hint = t.get("hint", "")
@@ -2150,9 +2166,7 @@ class ProactiveChatPlugin(star.Star):
                 lines.append(f"  • {job.id} → {time_str}")
 
         tracked_ids = {
-            t.get("job_id")
-            for tasks in self._pending_context_tasks.values()
-            for t in tasks
+            job_id for tasks in self._pending_context_tasks.values() for job_id in tasks
         }
         orphan_ctx = [j for j in ctx_jobs if j.id not in tracked_ids]
         if orphan_ctx:
@@ -90,7 +90,7 @@ def boundary_runner(monkeypatch: pytest.MonkeyPatch) -> BoundaryRunner:
 
         async def invoke_provider() -> None:
             async def preconditions(*_args, **_kwargs):
-                return {"enable": True}, 0, False
+                return {"enable": True}, 0, False, 0.0
 
             async def provider(*_args, **_kwargs):
                 entered.set()
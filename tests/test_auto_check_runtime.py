@@ -144,6 +144,7 @@ def test_auto_check_no_send_reschedules_without_delivery(monkeypatch) -> None:
                 {"_session_type": "private", "auto_check_settings": {"enable": True}},
                 0,
                 False,
+                0.0,
             )
 
         async def auto_check(*_args):
@@ -176,6 +177,7 @@ def test_auto_check_send_uses_existing_delivery_pipeline(monkeypatch) -> None:
                 {"_session_type": "private", "auto_check_settings": {"enable": True}},
                 0,
                 False,
+                0.0,
             )
 
         async def auto_check(*_args):
@@ -208,6 +210,7 @@ def test_group_auto_check_uses_existing_delivery_pipeline(monkeypatch) -> None:
                 {"_session_type": "group", "auto_check_settings": {"enable": True}},
                 0,
                 False,
+                0.0,
             )
 
         async def auto_check(*_args):
@@ -254,6 +257,7 @@ def test_habit_auto_check_no_send_keeps_single_habit_schedule(monkeypatch) -> No
                 },
                 0,
                 False,
+                0.0,
             )
 
         async def auto_check(*_args):
@@ -756,3 +756,39 @@ def test_finalization_cas_prevents_stale_mutation() -> None:
         return changed, *calls
 
     assert anyio.run(scenario) == (False, 0, 0)
+
+
+def test_finalization_leaves_source_task_cleanup_for_the_last_step() -> None:
+    async def scenario() -> tuple[bool, list[str], list[str]]:
+        registry = DeliveryCoordinatorRegistry()
+        session_id = "platform:GroupMessage:43"
+        gate = registry.record_activity(session_id)
+        task = {"job_id": "ctx_1", "reason": "晚點問候"}
+        saves: list[str] = []
+
+        async def save() -> None:
+            saves.append("save")
+
+        plugin = SimpleNamespace(
+            _find_habit_task=lambda *_args: None,
+            data_lock=anyio.Lock(),
+            session_data={
+                session_id: {"unanswered_count": 0, "pending_context_tasks": [task]}
+            },
+            _pending_context_tasks={session_id: {"ctx_1": task}},
+            _save_data=save,
+            _add_scheduled_job_at=lambda *_args, **_kwargs: None,
+            timezone=None,
+            _gate_verdict=lambda current: registry.verdict(
+                current, enabled=True, quiet_hours=False
+            ),
+        )
+        changed = await chat_executor._update_unanswered_and_reschedule(
+            plugin, session_id, {}, 0, ctx_job_id="ctx_1", gate=gate
+        )
+        after_finalize = list(plugin._pending_context_tasks.get(session_id, {}))
+        await chat_executor._cleanup_context_task(plugin, session_id, "ctx_1")
+        assert "pending_context_tasks" not in plugin.session_data[session_id]
+        return changed, after_finalize, saves
+
+    assert anyio.run(scenario) == (True, ["ctx_1"], ["save", "save"])
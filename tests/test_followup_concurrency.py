@@ -168,7 +168,7 @@ def test_red_failed_initial_cleans_source_exactly_once(
         cleanup_calls = controller_calls = history_calls = 0
 
         async def preconditions(*_args, **_kwargs):
-            return {"enable": True}, 0, False
+            return {"enable": True}, 0, False, 0.0
 
         async def provider(*_args, **_kwargs):
             return "initial", "conversation", "prompt", None
@@ -91,6 +91,16 @@ def test_baseline_permissive_parser_accepts_non_whole_json(raw: str) -> None:
     }
 
 
+def test_permissive_parser_extracts_nested_json_from_prose() -> None:
+    utils = _load_source_module("pcf01_nested_utils", ROOT / "core" / "utils.py")
+    raw = '判斷如下 {"reason": "對方說了 {晚安}", "meta": {"delay": [5, 10]}} 以上'
+
+    assert utils.parse_llm_json(raw, expect_type=dict) == {
+        "reason": "對方說了 {晚安}",
+        "meta": {"delay": [5, 10]},
+    }
+
+
 def test_schema_defines_exact_follow_up_defaults_and_bounds() -> None:
     schema = _load_schema()
     blocks = [
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import time
+from datetime import datetime
 from types import SimpleNamespace
 
 import anyio
 import pytest
-from astrbot_plugin_proactive_chat.core import context_predictor, proactive_prompt
+from astrbot_plugin_proactive_chat.core import (
+    context_predictor,
+    context_scheduling,
+    llm_helpers,
+    proactive_prompt,
+)
 from astrbot_plugin_proactive_chat.core.delivery import (
     AcceptedComponent,
     AcceptedComponentKind,
@@ -57,6 +64,51 @@ def test_context_analysis_rules_are_in_stable_system_prefix() -> None:
     anyio.run(scenario)
 
 
+def test_context_analysis_user_prompt_only_carries_per_call_fields() -> None:
+    async def scenario() -> None:
+        captured: list[dict[str, str]] = []
+
+        async def get_provider(_session_id: str) -> str:
+            return "provider"
+
+        async def generate(**kwargs):
+            captured.append(kwargs)
+            return SimpleNamespace(completion_text="[]")
+
+        context = SimpleNamespace(
+            get_current_chat_provider_id=get_provider,
+            llm_generate=generate,
+        )
+        context_predictor._RESPONSE_CACHE.clear()
+        await context_predictor.predict_proactive_timing(
+            context=context,
+            session_id="platform:FriendMessage:43",
+            last_message="我去跑步",
+            history=[],
+            current_time_str="2026年07月21日 18:00",
+            config={},
+            extra_prompt="運動類延遲 60 分鐘",
+        )
+        await context_predictor.check_should_cancel_tasks_batch(
+            context=context,
+            session_id="platform:FriendMessage:43",
+            last_message="跑完了",
+            tasks=[{"reason": "跑步", "hint": "問問跑得如何"}],
+        )
+
+        predict, cancel = captured
+        assert "運動類延遲 60 分鐘" in predict["system_prompt"]
+        assert "運動類延遲 60 分鐘" not in predict["prompt"]
+        assert "should_schedule" not in predict["prompt"]
+        assert "我去跑步" in predict["prompt"]
+        assert "should_cancel" in cancel["system_prompt"]
+        assert "should_cancel" not in cancel["prompt"]
+        assert cancel["prompt"].rstrip().endswith("不再需要。")
+        assert "跑完了" in cancel["prompt"]
+
+    anyio.run(scenario)
+
+
 def test_proactive_operation_rules_are_in_stable_system_prefix(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
@@ -158,3 +210,246 @@ def test_follow_up_rules_are_in_stable_system_prefix(
         assert "initial" not in captured["system_prompt"]
 
     anyio.run(scenario)
+
+
+def test_identical_context_analysis_requests_reuse_cached_response() -> None:
+    async def scenario() -> None:
+        calls: list[str] = []
+
+        async def get_provider(_session_id: str) -> str:
+            return "provider"
+
+        async def generate(**kwargs):
+            calls.append(kwargs["prompt"])
+            return SimpleNamespace(
+                completion_text=(
+                    '{"should_schedule":true,"delay_minutes":30,'
+                    '"reason":"吃飯","message_hint":"問問吃飽沒"}'
+                )
+            )
+
+        context = SimpleNamespace(
+            get_current_chat_provider_id=get_provider,
+            llm_generate=generate,
+        )
+        context_predictor._RESPONSE_CACHE.clear()
+        request = {
+            "context": context,
+            "session_id": "platform:FriendMessage:7",
+            "last_message": "我去吃飯",
+            "history": [],
+            "current_time_str": "2026年07月21日 12:00",
+            "config": {},
+        }
+        first = await context_predictor.predict_proactive_timing(**request)
+        second = await context_predictor.predict_proactive_timing(**request)
+        changed = await context_predictor.predict_proactive_timing(
+            **{**request, "last_message": "吃飽了"}
+        )
+
+        assert first == second
+        assert first is not second
+        assert changed is not None
+        assert len(calls) == 2
+
+    anyio.run(scenario)
+
+
+def test_concurrent_identical_context_analysis_requests_share_one_call() -> None:
+    async def scenario() -> None:
+        calls: list[str] = []
+        release = anyio.Event()
+
+        async def get_provider(_session_id: str) -> str:
+            return "provider"
+
+        async def generate(**kwargs):
+            calls.append(kwargs["prompt"])
+            await release.wait()
+            return SimpleNamespace(
+                completion_text=(
+                    '{"should_schedule":true,"delay_minutes":30,'
+                    '"reason":"洗澡","message_hint":"問問洗好沒"}'
+                )
+            )
+
+        context = SimpleNamespace(
+            get_current_chat_provider_id=get_provider,
+            llm_generate=generate,
+        )
+        context_predictor._RESPONSE_CACHE.clear()
+        request = {
+            "context": context,
+            "session_id": "platform:FriendMessage:8",
+            "last_message": "我去洗澡",
+            "history": [],
+            "current_time_str": "2026年07月21日 21:00",
+            "config": {},
+        }
+        results: list[dict | None] = []
+
+        async def predict() -> None:
+            results.append(
+                await context_predictor.predict_proactive_timing(**request)
+            )
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(predict)
+            tg.start_soon(predict)
+            await anyio.sleep(0.01)
+            release.set()
+
+        assert len(calls) == 1
+        assert len(results) == 2
+        assert results[0] == results[1]
+        assert results[0] is not None
+        assert not context_predictor._INFLIGHT_REQUESTS
+
+    anyio.run(scenario)
+
+
+def test_punctuation_only_messages_skip_context_scheduling_setup(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[str] = []
+
+    async def system_prompt(_context, session_id: str) -> str:
+        calls.append(session_id)
+        return ""
+
+    monkeypatch.setattr(context_scheduling, "get_current_system_prompt", system_prompt)
+
+    anyio.run(
+        context_scheduling.handle_context_aware_scheduling,
+        SimpleNamespace(context=SimpleNamespace()),
+        "platform:FriendMessage:45",
+        "？？？",
+        {},
+    )
+
+    assert calls == []
+
+
+def test_restored_context_tasks_drop_duplicate_job_ids_on_disk_too() -> None:
+    session_id = "platform:FriendMessage:49"
+    run_at = datetime.fromtimestamp(time.time() + 3600).isoformat()
+    first = {"job_id": "ctx_1", "run_at": run_at, "reason": "第一筆"}
+    duplicate = {"job_id": "ctx_1", "run_at": run_at, "reason": "重複"}
+    other = {"job_id": "ctx_2", "run_at": run_at, "reason": "另一筆"}
+    added: list[str] = []
+    scheduler = SimpleNamespace(
+        get_job=lambda _job_id: None,
+        add_job=lambda *_args, **kwargs: added.append(kwargs["id"]),
+    )
+    plugin = SimpleNamespace(
+        session_data={
+            session_id: {"pending_context_tasks": [first, duplicate, other]}
+        },
+        scheduler=scheduler,
+        check_and_chat=None,
+        timezone=None,
+        _pending_context_tasks={},
+    )
+
+    assert context_scheduling.restore_pending_context_tasks(plugin) is True
+
+    tasks = plugin._pending_context_tasks[session_id]
+    assert added == ["ctx_1", "ctx_2"]
+    assert list(tasks) == ["ctx_1", "ctx_2"]
+    assert tasks["ctx_1"] is first
+    persisted = plugin.session_data[session_id]["pending_context_tasks"]
+    assert persisted == [first, other]
+
+
+def test_recalled_memories_drop_duplicate_entries() -> None:
+    async def scenario() -> None:
+        async def search_memories(**kwargs):
+            return [
+                SimpleNamespace(content="下週要去東京出差"),
+                SimpleNamespace(content="  下週要去東京出差  "),
+                SimpleNamespace(content="喜歡喝無糖綠茶"),
+            ]
+
+        initializer = SimpleNamespace(
+            is_initialized=True,
+            memory_engine=SimpleNamespace(search_memories=search_memories),
+            config_manager=SimpleNamespace(
+                filtering_settings={
+                    "use_session_filtering": False,
+                    "use_persona_filtering": False,
+                }
+            ),
+        )
+        star = SimpleNamespace(
+            name="livingmemory",
+            activated=True,
+            star_cls=SimpleNamespace(initializer=initializer),
+        )
+        context = SimpleNamespace(get_all_stars=lambda: [star])
+
+        memory_str = await llm_helpers.recall_memories_for_proactive(
+            context, "platform:FriendMessage:46", "東京"
+        )
+
+        assert memory_str.splitlines()[1:] == [
+            "- 記憶 1: 下週要去東京出差",
+            "- 記憶 2: 喜歡喝無糖綠茶",
+        ]
+
+    anyio.run(scenario)
+
+
+def test_core_conversation_retry_catches_wrapped_sqlite_lock(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def no_sleep(_delay: float) -> None:
+        return None
+
+    monkeypatch.setattr(llm_helpers.asyncio, "sleep", no_sleep)
+
+    async def scenario() -> None:
+        attempts = 0
+
+        async def call() -> str:
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                try:
+                    raise RuntimeError("database is locked")
+                except RuntimeError as e:
+                    raise ValueError("commit failed") from e
+            return "ok"
+
+        result = await llm_helpers._retry_core_conversation_call(
+            "get", "platform:FriendMessage:47", call
+        )
+
+        assert result == "ok"
+        assert attempts == 2
+
+    anyio.run(scenario)
+
+
+def test_memory_query_skips_blank_description_for_task_hint(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    queries: list[str] = []
+
+    async def recall(_context, _session_id, query, **_kwargs) -> str:
+        queries.append(query)
+        return ""
+
+    monkeypatch.setattr(proactive_prompt, "recall_memories_for_proactive", recall)
+    plugin = SimpleNamespace(context=None, session_data={})
+    task = {"description": "   ", "hint": " 問問東京出差 ", "reason": None}
+
+    anyio.run(
+        proactive_prompt.inject_memory,
+        plugin,
+        "platform:FriendMessage:48",
+        {},
+        task,
+        "final prompt",
+    )
+
+    assert queries == ["問問東京出差"]
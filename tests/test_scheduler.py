@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime
+
+import pytest
+from astrbot_plugin_proactive_chat.core import scheduler
+
+NOW = datetime(2026, 7, 18, 9, 0)
+
+
+def _all_day_conf(**rule) -> dict:
+    return {
+        "min_interval_minutes": 1,
+        "max_interval_minutes": 1,
+        "schedule_rules": [{"start_hour": 0, "end_hour": 24, **rule}],
+    }
+
+
+def test_weight_buckets_filter_by_trigger_condition() -> None:
+    weights = "1-2:1@1,3-4:1@2-3,5-6:1@4+"
+
+    assert scheduler._parse_weight_buckets(weights, 0) == ((1.0,), ((60.0, 120.0),))
+    assert scheduler._parse_weight_buckets(weights, 1) == ((1.0,), ((180.0, 240.0),))
+    assert scheduler._parse_weight_buckets(weights, 2) == ((1.0,), ((180.0, 240.0),))
+    assert scheduler._parse_weight_buckets(weights, 3) == ((1.0,), ((300.0, 360.0),))
+    assert scheduler._parse_weight_buckets(weights, 9) == ((1.0,), ((300.0, 360.0),))
+
+
+def test_weight_buckets_skip_malformed_entries_whose_condition_misses() -> None:
+    weights = "garbage@2,1-2:1"
+
+    assert scheduler._parse_weight_buckets(weights, 0) == ((1.0,), ((60.0, 120.0),))
+    with pytest.raises(ValueError):
+        scheduler._parse_weight_buckets(weights, 1)
+
+
+def test_unparsable_weights_fall_back_to_global_interval_without_caching() -> None:
+    conf = _all_day_conf(interval_weights="1-2:abc")
+    scheduler._parse_weight_buckets.cache_clear()
+
+    assert scheduler.compute_weighted_interval(conf, now=NOW) == 60
+    assert scheduler.compute_weighted_interval(conf, now=NOW) == 60
+    info = scheduler._parse_weight_buckets.cache_info()
+    assert info.currsize == 0
+    assert info.misses == 2
+
+
+def test_weighted_pick_uses_cumulative_weights_of_matching_buckets(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    captured: dict = {}
+
+    def fake_choices(population, *, cum_weights):
+        captured["population"] = population
+        captured["cum_weights"] = cum_weights
+        return [population[1]]
+
+    monkeypatch.setattr(scheduler.random, "choices", fake_choices)
+    monkeypatch.setattr(scheduler.random, "uniform", lambda lo, _hi: lo)
+    conf = _all_day_conf(interval_weights="1-2:0.2,30s-60s:0.5,0-0:0.9,5-6:0.3")
+
+    assert scheduler.compute_weighted_interval(conf, now=NOW) == 30
+    assert captured["population"] == ((60.0, 120.0), (30.0, 60.0), (300.0, 360.0))
+    assert captured["cum_weights"] == pytest.approx((0.2, 0.7, 1.0))
+
+
+def test_seeded_weighted_pick_stays_in_range_and_favours_heavy_bucket(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(scheduler, "random", random.Random(7))
+
+    picks = [scheduler._pick_from_weights("1-2:0.9,10-11:0.1") for _ in range(500)]
+
+    light = sum(1 for pick in picks if 600 <= pick < 660)
+    assert all(60 <= pick < 120 or 600 <= pick < 660 for pick in picks)
+    assert 0 < light < 100
+
+
+def _decay_probability(
+    monkeypatch: pytest.MonkeyPatch, unanswered_count: int, conf: dict
+) -> float:
+    rolled: list[float] = []
+
+    def fake_roll(probability: float, _count: int, _label: str):
+        rolled.append(probability)
+        return True, ""
+
+    monkeypatch.setattr(scheduler, "_roll_probability", fake_roll)
+    scheduler.should_trigger_by_unanswered(unanswered_count, conf, now=NOW)
+    assert len(rolled) == 1
+    return rolled[0]
+
+
+def test_decay_continues_from_list_tail_past_the_end_of_decay_rate(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    conf = _all_day_conf(decay_rate="1,0.9,0.8")
+    conf.update(default_decay_rate="0.05", max_unanswered_times=0)
+
+    assert _decay_probability(monkeypatch, 3, conf) == 0.8
+    assert _decay_probability(monkeypatch, 4, conf) == 0.75
+    assert _decay_probability(monkeypatch, 5, conf) == 0.7
+    assert _decay_probability(monkeypatch, 30, conf) == 0.0
+
+
+def test_zero_decay_step_keeps_the_list_tail_or_full_probability(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    with_list = _all_day_conf(decay_rate="1,0.6")
+    with_list.update(default_decay_rate="0", max_unanswered_times=0)
+    without_list = {"default_decay_rate": "0", "max_unanswered_times": 0}
+
+    assert _decay_probability(monkeypatch, 50, with_list) == 0.6
+    assert _decay_probability(monkeypatch, 50, without_list) == 1.0
+
+
+def test_tiny_decay_step_is_computed_directly_for_large_counts(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    conf = {"default_decay_rate": "0.000000001", "max_unanswered_times": 0}
+
+    assert _decay_probability(monkeypatch, 1, conf) == 1.0
+    assert _decay_probability(monkeypatch, 2, conf) == 0.999999999
+    assert _decay_probability(monkeypatch, 10**9 + 1, conf) == 0.0
+    assert scheduler._continue_decay_from(0.5, 1e-9, 10**6) == 0.499
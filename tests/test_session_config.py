@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import anyio
+from astrbot_plugin_proactive_chat.core.config import (
+    get_session_config,
+    validate_config,
+)
+
+
+def _private_config(
+    sessions: list[dict], session_list: tuple[str, ...] = ()
+) -> dict:
+    return {
+        "private_sessions": sessions,
+        "private_settings": {"enable": True, "session_list": list(session_list)},
+    }
+
+
+def test_disabled_personal_entry_listed_first_wins_over_later_match() -> None:
+    config = _private_config(
+        [
+            {"session_id": "123", "enable": False, "session_name": "停用"},
+            {"session_id": "p:FriendMessage:123", "enable": True},
+        ],
+        session_list=("123",),
+    )
+
+    assert get_session_config(config, "p:FriendMessage:123") is None
+
+
+def test_full_umo_entry_does_not_match_other_platform_with_same_target() -> None:
+    config = _private_config(
+        [{"session_id": "p:FriendMessage:123", "enable": True, "session_name": "甲"}]
+    )
+
+    matched = get_session_config(config, "p:FriendMessage:123")
+    assert matched is not None
+    assert matched["_session_name"] == "甲"
+    assert matched["_session_type"] == "private"
+    assert get_session_config(config, "q:FriendMessage:123") is None
+
+
+def test_plain_id_matches_whole_or_last_segment_of_target_only() -> None:
+    config = _private_config([{"session_id": "123", "enable": True}])
+
+    assert get_session_config(config, "p:FriendMessage:123") is not None
+    assert get_session_config(config, "p:FriendMessage:x:123") is not None
+    assert get_session_config(config, "p:FriendMessage:4123") is None
+
+
+def test_two_part_shorthand_matches_as_friend_message() -> None:
+    config = _private_config([{"session_id": "p:123", "enable": True}])
+
+    assert get_session_config(config, "p:FriendMessage:123") is not None
+    assert get_session_config(config, "p:123") is not None
+    assert get_session_config(config, "q:FriendMessage:123") is None
+
+
+def test_session_list_matches_after_personal_entries_miss() -> None:
+    config = _private_config(
+        [{"session_id": "999", "enable": True}],
+        session_list=("p:FriendMessage:123", "456"),
+    )
+
+    by_umo = get_session_config(config, "p:FriendMessage:123")
+    by_id = get_session_config(config, "q:FriendMessage:456")
+    assert by_umo is not None and by_umo["_from_session_list"] is True
+    assert by_id is not None and by_id["_from_session_list"] is True
+    assert get_session_config(config, "q:FriendMessage:123") is None
+    assert get_session_config(config, "p:FriendMessage:4456") is None
+
+
+def test_validate_config_drops_indexes_built_from_the_previous_config() -> None:
+    config = _private_config([], session_list=("123",))
+    assert get_session_config(config, "p:FriendMessage:456") is None
+
+    # 同長度的就地修改：只有重新驗證（插件重載）後才會生效
+    config["private_settings"]["session_list"][0] = "456"
+    anyio.run(validate_config, config)
+
+    assert get_session_config(config, "p:FriendMessage:456") is not None
+    assert get_session_config(config, "p:FriendMessage:123") is None